@@ -1,114 +1,345 @@
 """API response caching to reduce rate limit issues."""
-import json
+import threading
 import time
-import hashlib
-from datetime import datetime, timedelta
-from typing import Dict, Any, Optional
-from backend.database import Database
+import zlib
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Any, Optional, Tuple, List
+import orjson
+from backend.database import Database, API_CACHE_TABLE_SQL
+
+# Statements are kept as constants so every call passes the identical string
+_SELECT_SQL = """
+    SELECT response_data, expires_at
+    FROM api_cache
+    WHERE cache_key = ? AND expires_at >= ?
+"""
+
+_SELECT_STALE_SQL = """
+    SELECT response_data, etag, last_modified
+    FROM api_cache
+    WHERE cache_key = ? AND (etag IS NOT NULL OR last_modified IS NOT NULL)
+"""
+
+_UPSERT_SQL = """
+    INSERT INTO api_cache (cache_key, endpoint, response_data, cached_at, expires_at,
+                           etag, last_modified)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (cache_key) DO UPDATE SET
+        response_data = excluded.response_data,
+        cached_at = excluded.cached_at,
+        expires_at = excluded.expires_at,
+        etag = excluded.etag,
+        last_modified = excluded.last_modified
+"""
+
+_REFRESH_SQL = """
+    UPDATE api_cache SET cached_at = ?, expires_at = ?
+    WHERE cache_key = ?
+    RETURNING response_data
+"""
+
+# DuckDB has no DELETE ... LIMIT, so each chunk is selected in a subquery.
+# Entries that can be revalidated with a conditional GET are kept for a
+# grace period after expiry.
+_DELETE_EXPIRED_SQL = """
+    DELETE FROM api_cache
+    WHERE cache_key IN (
+        SELECT cache_key FROM api_cache
+        WHERE expires_at < CASE
+            WHEN etag IS NULL AND last_modified IS NULL THEN ? ELSE ?
+        END
+        LIMIT ?
+    )
+"""
+
+# Maximum number of expired rows removed per DELETE in cleanup_expired()
+CLEANUP_BATCH_SIZE = 1000
+
+# Payloads at least this large are zlib-compressed before being stored
+COMPRESS_MIN_BYTES = 1024
+
+
+def _encode(data: Dict[str, Any]) -> bytes:
+    """Serialize response data for storage, compressing large payloads."""
+    raw = orjson.dumps(data)
+    if len(raw) >= COMPRESS_MIN_BYTES:
+        return zlib.compress(raw, 3)
+    return raw
+
+
+def _decode(blob: bytes) -> Dict[str, Any]:
+    """Deserialize stored response data.
+    
+    zlib streams start with 0x78 ('x'), which no JSON document can, so
+    compressed and plain rows can be told apart without a marker column.
+    """
+    if blob[:1] == b"x":
+        blob = zlib.decompress(blob)
+    return orjson.loads(blob)
+
+
+# How long expired entries with validators are kept for revalidation (1 week)
+STALE_GRACE_SECONDS = 7 * 24 * 3600
 
 
 class APICache:
-    """Cache API responses in database to reduce API calls."""
+    """Cache API responses in database to reduce API calls.
+    
+    Hot entries are also kept in an in-process LRU so repeated lookups skip
+    the database round-trip and JSON decoding. Responses are serialized with
+    orjson and stored as raw bytes, zlib-compressed when large. The database
+    remains the authoritative store.
     
-    def __init__(self, db: Database, default_ttl_seconds: int = 3600):
+    The cache may be shared between threads. All of its database reads and
+    writes go through a per-thread cursor of its own, an independent DuckDB
+    connection, so they never run on another thread's connection and never
+    join a transaction the caller has open on the Database. Writes and the
+    in-process layer are additionally guarded by a lock.
+    
+    Single writes rely on DuckDB's autocommit; only batch() opens an explicit
+    transaction, on the calling thread's cache cursor.
+    """
+    
+    def __init__(self, db: Database, default_ttl_seconds: int = 3600, memory_size: int = 256):
         """Initialize API cache.
         
         Args:
             db: Database instance
             default_ttl_seconds: Default time-to-live for cached responses (default: 1 hour)
+            memory_size: Maximum number of entries held in the in-process layer
         """
         self.db = db
         self.default_ttl = default_ttl_seconds
+        self.memory_size = memory_size
+        # endpoint -> (expires_at epoch seconds, response data)
+        self._mem: "OrderedDict[str, Tuple[int, Dict[str, Any]]]" = OrderedDict()
+        # Endpoints written inside an open batch(), or None outside a batch
+        self._batch_endpoints: Optional[List[str]] = None
+        self._lock = threading.RLock()
+        # Per-thread cursor, closed when its thread ends (see _cursor)
+        self._local = threading.local()
         self._initialize_cache_table()
     
     def _initialize_cache_table(self):
         """Create cache table if it doesn't exist."""
-        self.db.execute("""
-            CREATE TABLE IF NOT EXISTS api_cache (
-                cache_key TEXT PRIMARY KEY,
-                endpoint TEXT NOT NULL,
-                response_data TEXT NOT NULL,
-                cached_at TEXT NOT NULL,
-                expires_at TEXT NOT NULL
-            )
-        """)
-        self.db.commit()
+        cursor = self._cursor()
+        cursor.execute(API_CACHE_TABLE_SQL)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_api_cache_expires ON api_cache(expires_at)")
     
     def _generate_key(self, endpoint: str) -> str:
         """Generate cache key from endpoint.
         
+        Endpoint paths are short and already unique, so the path itself is
+        used as the key instead of a digest of it.
+        
         Args:
             endpoint: API endpoint path
             
         Returns:
             Cache key
         """
-        return hashlib.md5(endpoint.encode()).hexdigest()
+        return endpoint
     
-    def get(self, endpoint: str) -> Optional[Dict[str, Any]]:
-        """Get cached response if available and not expired.
+    def _cursor(self):
+        """Get this thread's cursor for cache reads and writes, opening it on first use."""
+        return self.db.thread_cursor(self._local)
+    
+    def _remember(self, endpoint: str, expires_at: int, data: Dict[str, Any]):
+        """Store an entry in the in-process layer, evicting the least recently used."""
+        self._mem[endpoint] = (expires_at, data)
+        self._mem.move_to_end(endpoint)
+        while len(self._mem) > self.memory_size:
+            self._mem.popitem(last=False)
+    
+    def lookup(self, endpoint: str) -> Tuple[bool, Optional[Dict[str, Any]]]:
+        """Look up a cached response with a single query.
+        
+        Unlike get(), a hit is reported separately from the data so that
+        empty cached payloads are not mistaken for misses.
         
         Args:
             endpoint: API endpoint path
             
         Returns:
-            Cached response data or None if not found/expired
+            Tuple of (hit, cached response data or None)
         """
+        now = int(time.time())
+        with self._lock:
+            entry = self._mem.get(endpoint)
+            if entry:
+                expires_at, data = entry
+                if now <= expires_at:
+                    self._mem.move_to_end(endpoint)
+                    return True, data
+                del self._mem[endpoint]
+        
         cache_key = self._generate_key(endpoint)
         
-        result = self.db.fetchone("""
-            SELECT response_data, expires_at
-            FROM api_cache
-            WHERE cache_key = ?
-        """, (cache_key,))
+        # Expired rows are filtered here and reaped in bulk by cleanup_expired()
+        result = self._cursor().execute(_SELECT_SQL, (cache_key, now)).fetchone()
         
         if not result:
-            return None
+            return False, None
+        
+        response_data, expires_at = result
+        data = _decode(response_data)
+        with self._lock:
+            self._remember(endpoint, expires_at, data)
+        return True, data
+    
+    def get_many(self, endpoints: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Look up several cached responses with a single query.
+        
+        Args:
+            endpoints: API endpoint paths
+            
+        Returns:
+            Dictionary mapping each endpoint that was a hit to its cached data;
+            misses and expired entries are left out
+        """
+        now = int(time.time())
+        results: Dict[str, Dict[str, Any]] = {}
+        missing: Dict[str, str] = {}
+        with self._lock:
+            for endpoint in endpoints:
+                entry = self._mem.get(endpoint)
+                if entry and now <= entry[0]:
+                    self._mem.move_to_end(endpoint)
+                    results[endpoint] = entry[1]
+                else:
+                    missing[self._generate_key(endpoint)] = endpoint
+        
+        if not missing:
+            return results
         
-        response_data, expires_at_str = result
-        expires_at = datetime.fromisoformat(expires_at_str)
+        placeholders = ", ".join("?" * len(missing))
+        rows = self._cursor().execute(f"""
+            SELECT cache_key, response_data, expires_at
+            FROM api_cache
+            WHERE cache_key IN ({placeholders}) AND expires_at >= ?
+        """, (*missing, now)).fetchall()
+        
+        with self._lock:
+            for cache_key, response_data, expires_at in rows:
+                endpoint = missing[cache_key]
+                data = _decode(response_data)
+                self._remember(endpoint, expires_at, data)
+                results[endpoint] = data
+        return results
+    
+    def get_validators(self, endpoint: str) -> Optional[Tuple[Optional[str], Optional[str]]]:
+        """Get the ETag and Last-Modified values stored for an endpoint.
         
-        # Check if expired
-        if datetime.utcnow() > expires_at:
-            # Delete expired entry
-            self.db.execute("DELETE FROM api_cache WHERE cache_key = ?", (cache_key,))
-            self.db.commit()
+        Used to turn a refetch of an expired entry into a conditional request.
+        
+        Args:
+            endpoint: API endpoint path
+            
+        Returns:
+            Tuple of (etag, last_modified), or None if nothing can be revalidated
+        """
+        result = self._cursor().execute(
+            _SELECT_STALE_SQL, (self._generate_key(endpoint),)
+        ).fetchone()
+        if not result:
             return None
+        return result[1], result[2]
+    
+    def refresh(self, endpoint: str, ttl_seconds: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """Extend the lifetime of a cached entry the server reported unchanged.
         
-        # Return cached data
-        return json.loads(response_data)
+        Args:
+            endpoint: API endpoint path
+            ttl_seconds: Time-to-live in seconds (defaults to instance default)
+            
+        Returns:
+            The cached response data, or None if the entry no longer exists
+        """
+        now = int(time.time())
+        expires_at = now + (ttl_seconds or self.default_ttl)
+        with self._lock:
+            result = self._cursor().execute(
+                _REFRESH_SQL, (now, expires_at, self._generate_key(endpoint))
+            ).fetchone()
+            if not result:
+                return None
+            
+            data = _decode(result[0])
+            self._remember(endpoint, expires_at, data)
+        return data
     
-    def set(self, endpoint: str, data: Dict[str, Any], ttl_seconds: Optional[int] = None):
+    def get(self, endpoint: str) -> Optional[Dict[str, Any]]:
+        """Get cached response if available and not expired.
+        
+        Args:
+            endpoint: API endpoint path
+            
+        Returns:
+            Cached response data or None if not found/expired
+        """
+        return self.lookup(endpoint)[1]
+    
+    def set(self, endpoint: str, data: Dict[str, Any], ttl_seconds: Optional[int] = None,
+            etag: Optional[str] = None, last_modified: Optional[str] = None):
         """Cache API response.
         
         Args:
             endpoint: API endpoint path
             data: Response data to cache
             ttl_seconds: Time-to-live in seconds (defaults to instance default)
+            etag: ETag header of the response, for conditional refetches
+            last_modified: Last-Modified header of the response, for conditional refetches
         """
         cache_key = self._generate_key(endpoint)
         ttl = ttl_seconds or self.default_ttl
         
-        now = datetime.utcnow()
-        expires_at = now + timedelta(seconds=ttl)
-        
-        response_json = json.dumps(data)
-        
-        self.db.execute("""
-            INSERT INTO api_cache (cache_key, endpoint, response_data, cached_at, expires_at)
-            VALUES (?, ?, ?, ?, ?)
-            ON CONFLICT (cache_key) DO UPDATE SET
-                response_data = excluded.response_data,
-                cached_at = excluded.cached_at,
-                expires_at = excluded.expires_at
-        """, (
-            cache_key,
-            endpoint,
-            response_json,
-            now.isoformat(),
-            expires_at.isoformat()
-        ))
-        self.db.commit()
+        now = int(time.time())
+        expires_at = now + ttl
+        
+        response_blob = _encode(data)
+        
+        with self._lock:
+            self._cursor().execute(_UPSERT_SQL, (
+                cache_key,
+                endpoint,
+                response_blob,
+                now,
+                expires_at,
+                etag,
+                last_modified
+            ))
+            if self._batch_endpoints is not None:
+                self._batch_endpoints.append(endpoint)
+            self._remember(endpoint, expires_at, data)
+    
+    @contextmanager
+    def batch(self):
+        """Group several set() calls into a single transaction.
+        
+        Writes made inside the block are committed once on exit, or rolled
+        back together if the block raises. A nested batch joins the enclosing
+        one. Other threads' writes wait until the batch finishes.
+        """
+        with self._lock:
+            if self._batch_endpoints is not None:
+                yield self
+                return
+            
+            cursor = self._cursor()
+            cursor.execute("BEGIN TRANSACTION")
+            self._batch_endpoints = []
+            try:
+                yield self
+            except BaseException:
+                cursor.execute("ROLLBACK")
+                for endpoint in self._batch_endpoints:
+                    self._mem.pop(endpoint, None)
+                raise
+            else:
+                cursor.commit()
+            finally:
+                self._batch_endpoints = None
     
     def clear(self, endpoint: Optional[str] = None):
         """Clear cache entries.
@@ -116,16 +347,46 @@ class APICache:
         Args:
             endpoint: Specific endpoint to clear, or None to clear all
         """
-        if endpoint:
-            cache_key = self._generate_key(endpoint)
-            self.db.execute("DELETE FROM api_cache WHERE cache_key = ?", (cache_key,))
-        else:
-            self.db.execute("DELETE FROM api_cache")
-        self.db.commit()
-    
-    def cleanup_expired(self):
-        """Remove expired cache entries."""
-        now = datetime.utcnow().isoformat()
-        self.db.execute("DELETE FROM api_cache WHERE expires_at < ?", (now,))
-        self.db.commit()
-
+        with self._lock:
+            if endpoint:
+                cache_key = self._generate_key(endpoint)
+                self._cursor().execute("DELETE FROM api_cache WHERE cache_key = ?", (cache_key,))
+                self._mem.pop(endpoint, None)
+            else:
+                self._cursor().execute("DELETE FROM api_cache")
+                self._mem.clear()
+    
+    def cleanup_expired(self, batch_size: int = CLEANUP_BATCH_SIZE,
+                        stale_grace_seconds: int = STALE_GRACE_SECONDS) -> int:
+        """Remove expired cache entries.
+        
+        Called at startup and before each scheduled update so that reads never
+        have to delete stale rows themselves. Rows are deleted in chunks of
+        ``batch_size`` so a large expiry doesn't hold one long write. Entries
+        with an ETag or Last-Modified value are kept for ``stale_grace_seconds``
+        after expiry so they can still be revalidated.
+        
+        Args:
+            batch_size: Maximum number of rows removed per statement
+            stale_grace_seconds: How long revalidatable entries outlive their expiry
+            
+        Returns:
+            Number of rows removed
+        """
+        now = int(time.time())
+        removed = 0
+        while True:
+            # Lock per chunk so other threads' writes can interleave
+            with self._lock:
+                deleted = self._cursor().execute(
+                    _DELETE_EXPIRED_SQL, (now, now - stale_grace_seconds, batch_size)
+                ).fetchone()[0]
+            removed += deleted
+            if deleted < batch_size:
+                break
+        
+        with self._lock:
+            for endpoint in [key for key, (expires_at, _) in self._mem.items() if expires_at < now]:
+                del self._mem[endpoint]
+        
+        return removed
@@ -1,9 +1,14 @@
 """External API client for football-data.org."""
 import os
+import asyncio
 import logging
+import random
+import threading
 import time
 import httpx
-from typing import Dict, List, Optional, Any
+import orjson
+from typing import Dict, List, Optional, Any, Tuple
+from urllib.parse import parse_qsl, urlencode
 from dotenv import load_dotenv
 from backend.api_cache import APICache
 
@@ -11,6 +16,13 @@ load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+# Cache lifetimes (seconds) for endpoints that change far less often than
+# live competition data, matched by endpoint prefix. Anything unmatched uses
+# the cache's default TTL (API_CACHE_TTL).
+CACHE_TTL_BY_PREFIX = {
+    "teams/": 24 * 3600,  # Team metadata is effectively static
+}
+
 
 class APIClient:
     """Client for fetching data from football-data.org API."""
@@ -40,24 +52,292 @@ class APIClient:
                 "Get a free API key from https://www.football-data.org/client/register"
             )
         
-        self.headers = {
-            "X-Auth-Token": self.api_key,
-            "Content-Type": "application/json"
-        }
+        # Installed on the HTTP clients once rather than passed per request
+        self.headers = {"X-Auth-Token": self.api_key}
+        # Shown in 403 errors; only the last 4 characters are revealed
+        self._redacted_key = (
+            '*' * (len(self.api_key) - 4) + self.api_key[-4:] if len(self.api_key) > 4 else '***'
+        )
+        
+        # Shared HTTP client so connections (and TLS sessions) are reused
+        # across requests; created lazily on first request
+        self._client: Optional[httpx.Client] = None
+        # Concurrent requests (get_many) run on a private event loop in a
+        # background thread, so its async client and connections outlive
+        # each call; both are created lazily
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[threading.Thread] = None
+        self._async_client: Optional[httpx.AsyncClient] = None
+        # Guards lazy client creation and the rate-limit bucket, so one
+        # client can be shared by worker threads
+        self._lock = threading.Lock()
         
-        # Rate limiting: track last request time
-        self.last_request_time = 0
+        # Rate limiting: token bucket refilled at one token per interval, so
+        # naturally spaced requests never sleep and short bursts are allowed
         self.min_request_interval = float(os.getenv("API_MIN_REQUEST_INTERVAL", "0.1"))  # 100ms between requests
+        self.rate_limit_burst = float(os.getenv("API_RATE_LIMIT_BURST", "3"))
+        self._tokens = self.rate_limit_burst
+        self._last_refill = time.monotonic()
         
         logger.info(f"APIClient initialized with base URL: {self.base_url}, caching: {self.use_cache}")
     
+    def _get_client(self) -> httpx.Client:
+        """Get the shared HTTP client, creating it on first use.
+        
+        Returns:
+            Persistent httpx client
+        """
+        with self._lock:
+            if self._client is None:
+                self._client = httpx.Client(headers=self.headers, timeout=30.0)
+            return self._client
+    
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        """Get the event loop that runs concurrent requests, starting it on first use.
+        
+        Returns:
+            Event loop running in a background thread
+        """
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._loop_thread = threading.Thread(
+                    target=self._loop.run_forever, name="api-client-loop", daemon=True
+                )
+                self._loop_thread.start()
+            return self._loop
+    
+    def _get_async_client(self) -> httpx.AsyncClient:
+        """Get the shared async HTTP client, creating it on first use.
+        
+        Only called from the client's own event loop, which runs on a single
+        thread, so no locking is needed.
+        
+        Returns:
+            Persistent httpx async client
+        """
+        if self._async_client is None:
+            self._async_client = httpx.AsyncClient(headers=self.headers, timeout=30.0)
+        return self._async_client
+    
+    def _retry_delay(self, attempt: int, response: Optional[httpx.Response] = None) -> float:
+        """Work out how long to wait before retrying a request.
+        
+        Honours the ``Retry-After`` header sent with 429 responses and falls
+        back to exponential backoff with jitter, so concurrent clients don't
+        retry in lockstep.
+        
+        Args:
+            attempt: Zero-based attempt number that just failed
+            response: Response that triggered the retry, if any
+            
+        Returns:
+            Seconds to wait
+        """
+        if response is not None:
+            try:
+                return max(0.0, float(response.headers.get("Retry-After")))
+            except (TypeError, ValueError):
+                pass
+        return 2 ** attempt + random.uniform(0, 0.3)
+    
+    def warmup(self):
+        """Open a pooled connection to the API host ahead of the first request.
+        
+        Sends a bodiless HEAD request to the base URL so the TCP/TLS handshake
+        is already done when real requests start. The request counts against
+        the API quota, so it takes a rate-limit token like any other. Failures
+        are ignored; the next request simply connects itself.
+        """
+        self._rate_limit()
+        try:
+            self._get_client().head(self.base_url)
+        except httpx.HTTPError as e:
+            logger.debug(f"API connection warmup failed: {e}")
+    
+    def close(self):
+        """Close the shared HTTP clients and release their connections."""
+        if self._client:
+            self._client.close()
+            self._client = None
+        if self._loop:
+            if self._async_client:
+                asyncio.run_coroutine_threadsafe(self._async_client.aclose(), self._loop).result()
+                self._async_client = None
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._loop_thread.join()
+            self._loop.close()
+            self._loop = None
+            self._loop_thread = None
+    
+    def __enter__(self):
+        """Context manager entry."""
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Context manager exit."""
+        self.close()
+    
+    def _reserve_request_slot(self) -> float:
+        """Reserve the next request slot allowed by the rate limit.
+        
+        Returns:
+            Seconds to wait before sending the request
+        """
+        if self.min_request_interval <= 0:
+            return 0.0
+        
+        rate = 1.0 / self.min_request_interval  # tokens per second
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.rate_limit_burst, self._tokens + (now - self._last_refill) * rate)
+            self._last_refill = now
+            
+            # Tokens may go negative: each reservation queues behind earlier ones
+            self._tokens -= 1
+            tokens = self._tokens
+        if tokens >= 0:
+            return 0.0
+        return -tokens / rate
+    
     def _rate_limit(self):
-        """Enforce minimum time between requests."""
-        elapsed = time.time() - self.last_request_time
-        if elapsed < self.min_request_interval:
-            sleep_time = self.min_request_interval - elapsed
-            time.sleep(sleep_time)
-        self.last_request_time = time.time()
+        """Enforce the request rate limit, sleeping only when out of tokens."""
+        wait_time = self._reserve_request_slot()
+        if wait_time > 0:
+            time.sleep(wait_time)
+    
+    def _raise_for_status(self, response: httpx.Response, url: str):
+        """Raise for error responses, with a helpful message for 403.
+        
+        Args:
+            response: HTTP response
+            url: Requested URL
+            
+        Raises:
+            httpx.HTTPStatusError: If the response is an error
+        """
+        # Handle 403 specifically with helpful message
+        if response.status_code == 403:
+            error_msg = (
+                f"403 Forbidden: Access denied to {url}\n"
+                f"This usually means:\n"
+                f"  1. Your API key is invalid or expired\n"
+                f"  2. Your API key doesn't have access to this endpoint\n"
+                f"  3. You've exceeded your API rate limit\n\n"
+                f"Current API key: {self._redacted_key}\n"
+                f"Get a free API key from: https://www.football-data.org/client/register"
+            )
+            logger.error(error_msg)
+            raise httpx.HTTPStatusError(
+                error_msg,
+                request=response.request,
+                response=response
+            )
+        
+        response.raise_for_status()
+    
+    @staticmethod
+    def _build_endpoint(path: str, **params: Any) -> str:
+        """Build a canonical endpoint path with a sorted query string.
+        
+        Parameters that are None are left out, so equivalent requests always
+        produce the same endpoint (and therefore the same cache key).
+        
+        Args:
+            path: Endpoint path without query string
+            **params: Query parameters
+            
+        Returns:
+            Canonical endpoint, e.g. "competitions/CL/matches?season=2023"
+        """
+        path = path.strip('/')
+        query = urlencode(sorted((key, value) for key, value in params.items() if value is not None))
+        return f"{path}?{query}" if query else path
+    
+    @classmethod
+    def _canonical_endpoint(cls, endpoint: str) -> str:
+        """Normalize a raw endpoint string to the form built by _build_endpoint.
+        
+        Repeated keys and blank values are kept, so queries that differ only
+        in those never share a cache key.
+        
+        Args:
+            endpoint: API endpoint path, optionally with a query string
+            
+        Returns:
+            Canonical endpoint
+        """
+        path, _, query = endpoint.partition('?')
+        path = path.strip('/')
+        query = urlencode(sorted(parse_qsl(query, keep_blank_values=True)))
+        return f"{path}?{query}" if query else path
+    
+    def _cache_ttl_for(self, endpoint: str) -> Optional[int]:
+        """Get the cache TTL for an endpoint from CACHE_TTL_BY_PREFIX.
+        
+        Args:
+            endpoint: API endpoint path
+            
+        Returns:
+            TTL in seconds, or None to use the cache's default
+        """
+        endpoint = endpoint.lstrip('/')
+        for prefix, ttl in CACHE_TTL_BY_PREFIX.items():
+            if endpoint.startswith(prefix):
+                return ttl
+        return None
+    
+    def _conditional_headers(self, endpoint: str) -> Dict[str, str]:
+        """Build revalidation headers for an expired cache entry.
+        
+        Args:
+            endpoint: Canonical API endpoint path
+            
+        Returns:
+            If-None-Match/If-Modified-Since headers, empty if the endpoint
+            has no stored validators
+        """
+        headers: Dict[str, str] = {}
+        validators = self.cache.get_validators(endpoint)
+        if validators:
+            etag, last_modified = validators
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
+        return headers
+    
+    def _revalidated(self, endpoint: str, cache_ttl: Optional[int]) -> Optional[Dict[str, Any]]:
+        """Reuse the cached copy of an endpoint after a 304 Not Modified.
+        
+        Args:
+            endpoint: Canonical API endpoint path
+            cache_ttl: Cache TTL in seconds (None for the cache's default)
+            
+        Returns:
+            Cached response data with a renewed expiry, or None if the cached
+            copy vanished meanwhile and the endpoint must be fetched again
+        """
+        data = self.cache.refresh(endpoint, cache_ttl) if self.cache else None
+        if data is not None:
+            logger.debug(f"Not modified, cache refreshed for: {endpoint}")
+        return data
+    
+    def _cache_response(self, endpoint: str, data: Dict[str, Any], cache_ttl: Optional[int],
+                        response: httpx.Response):
+        """Cache a fetched response together with its validators.
+        
+        Args:
+            endpoint: Canonical API endpoint path
+            data: JSON response data
+            cache_ttl: Cache TTL in seconds (None for the cache's default)
+            response: HTTP response carrying the ETag/Last-Modified headers
+        """
+        self.cache.set(
+            endpoint, data, cache_ttl,
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified")
+        )
     
     def _make_request(self, endpoint: str, use_cache: Optional[bool] = None, 
                      cache_ttl: Optional[int] = None) -> Dict[str, Any]:
@@ -66,7 +346,7 @@ class APIClient:
         Args:
             endpoint: API endpoint path
             use_cache: Override instance cache setting
-            cache_ttl: Custom cache TTL in seconds
+            cache_ttl: Custom cache TTL in seconds (defaults to CACHE_TTL_BY_PREFIX)
             
         Returns:
             JSON response data
@@ -75,15 +355,24 @@ class APIClient:
             httpx.HTTPStatusError: If request fails
             ValueError: If API key is invalid or missing
         """
-        url = f"{self.base_url}/{endpoint.lstrip('/')}"
+        # The canonical form is used for both the URL and the cache key
+        endpoint = self._canonical_endpoint(endpoint)
+        url = f"{self.base_url}/{endpoint}"
         should_cache = use_cache if use_cache is not None else self.use_cache
+        if cache_ttl is None:
+            cache_ttl = self._cache_ttl_for(endpoint)
+        # Extra per-request headers, on top of the client's defaults
+        headers: Dict[str, str] = {}
         
         # Check cache first
         if should_cache and self.cache:
-            cached_data = self.cache.get(endpoint)
-            if cached_data:
+            hit, cached_data = self.cache.lookup(endpoint)
+            if hit:
                 logger.debug(f"Cache hit for: {endpoint}")
                 return cached_data
+            
+            # Expired entries with validators are revalidated instead of refetched
+            headers = self._conditional_headers(endpoint)
         
         # Rate limiting
         self._rate_limit()
@@ -91,46 +380,36 @@ class APIClient:
         logger.debug(f"Making request to: {url}")
         
         max_retries = 3
-        retry_delay = 1  # Start with 1 second
         
         for attempt in range(max_retries):
             try:
-                with httpx.Client(timeout=30.0) as client:
-                    response = client.get(url, headers=self.headers)
-                    
-                    # Handle 429 (Too Many Requests) with exponential backoff
-                    if response.status_code == 429:
-                        if attempt < max_retries - 1:
-                            wait_time = retry_delay * (2 ** attempt)
-                            logger.warning(
-                                f"Rate limited (429) for {endpoint}. "
-                                f"Retrying in {wait_time} seconds (attempt {attempt + 1}/{max_retries})"
-                            )
-                            time.sleep(wait_time)
-                            continue
-                        else:
-                            error_msg = (
-                                f"429 Too Many Requests: Rate limit exceeded for {url}\n"
-                                f"Please wait before making more requests. "
-                                f"Consider increasing UPDATE_INTERVAL or using cached data."
-                            )
-                            logger.error(error_msg)
-                            raise httpx.HTTPStatusError(
-                                error_msg,
-                                request=response.request,
-                                response=response
-                            )
-                    
-                    # Handle 403 specifically with helpful message
-                    if response.status_code == 403:
+                response = self._get_client().get(url, headers=headers)
+                
+                if response.status_code == 304:
+                    data = self._revalidated(endpoint, cache_ttl)
+                    if data is not None:
+                        return data
+                    # Cached copy vanished meanwhile; fetch it unconditionally
+                    # right away, without spending a retry attempt
+                    headers = {}
+                    self._rate_limit()
+                    response = self._get_client().get(url, headers=headers)
+                
+                # Handle 429 (Too Many Requests) with exponential backoff
+                if response.status_code == 429:
+                    if attempt < max_retries - 1:
+                        wait_time = self._retry_delay(attempt, response)
+                        logger.warning(
+                            f"Rate limited (429) for {endpoint}. "
+                            f"Retrying in {wait_time:.1f} seconds (attempt {attempt + 1}/{max_retries})"
+                        )
+                        time.sleep(wait_time)
+                        continue
+                    else:
                         error_msg = (
-                            f"403 Forbidden: Access denied to {url}\n"
-                            f"This usually means:\n"
-                            f"  1. Your API key is invalid or expired\n"
-                            f"  2. Your API key doesn't have access to this endpoint\n"
-                            f"  3. You've exceeded your API rate limit\n\n"
-                            f"Current API key: {'*' * (len(self.api_key) - 4) + self.api_key[-4:] if len(self.api_key) > 4 else '***'}\n"
-                            f"Get a free API key from: https://www.football-data.org/client/register"
+                            f"429 Too Many Requests: Rate limit exceeded for {url}\n"
+                            f"Please wait before making more requests. "
+                            f"Consider increasing UPDATE_INTERVAL or using cached data."
                         )
                         logger.error(error_msg)
                         raise httpx.HTTPStatusError(
@@ -138,16 +417,16 @@ class APIClient:
                             request=response.request,
                             response=response
                         )
-                    
-                    response.raise_for_status()
-                    data = response.json()
-                    
-                    # Cache the response
-                    if should_cache and self.cache:
-                        self.cache.set(endpoint, data, cache_ttl)
-                    
-                    return data
-                    
+                
+                self._raise_for_status(response, url)
+                data = orjson.loads(response.content)
+                
+                # Cache the response
+                if should_cache and self.cache:
+                    self._cache_response(endpoint, data, cache_ttl, response)
+                
+                return data
+                
             except httpx.HTTPStatusError as e:
                 if e.response.status_code == 429 and attempt < max_retries - 1:
                     continue  # Will retry
@@ -156,8 +435,8 @@ class APIClient:
                 raise
             except httpx.RequestError as e:
                 if attempt < max_retries - 1:
-                    wait_time = retry_delay * (2 ** attempt)
-                    logger.warning(f"Request error for {url}, retrying in {wait_time}s: {e}")
+                    wait_time = self._retry_delay(attempt)
+                    logger.warning(f"Request error for {url}, retrying in {wait_time:.1f}s: {e}")
                     time.sleep(wait_time)
                     continue
                 logger.error(f"Request error for {url}: {e}")
@@ -166,6 +445,139 @@ class APIClient:
         # Should not reach here, but just in case
         raise Exception(f"Failed to make request to {url} after {max_retries} attempts")
     
+    async def _make_request_async(self, endpoint: str, semaphore: asyncio.Semaphore,
+                                  headers: Dict[str, str]) -> Tuple[Dict[str, Any], Optional[httpx.Response]]:
+        """Make HTTP request to API without blocking the event loop.
+        
+        Caching new responses is left to the caller (see get_many_async).
+        
+        Args:
+            endpoint: Canonical API endpoint path
+            semaphore: Limits the number of requests in flight
+            headers: Extra per-request headers, e.g. for revalidation
+            
+        Returns:
+            Tuple of (JSON response data, response to cache), where the
+            response is None if the cached copy was revalidated with a 304
+            
+        Raises:
+            httpx.HTTPStatusError: If request fails
+        """
+        url = f"{self.base_url}/{endpoint}"
+        client = self._get_async_client()
+        
+        max_retries = 3
+        
+        async with semaphore:
+            for attempt in range(max_retries):
+                # Rate limiting: slots are handed out in order across tasks
+                wait_time = self._reserve_request_slot()
+                if wait_time > 0:
+                    await asyncio.sleep(wait_time)
+                
+                logger.debug(f"Making request to: {url}")
+                try:
+                    response = await client.get(url, headers=headers)
+                    if response.status_code == 304:
+                        data = self._revalidated(endpoint, self._cache_ttl_for(endpoint))
+                        if data is not None:
+                            return data, None
+                        # Cached copy vanished meanwhile; fetch it unconditionally
+                        # right away, without spending a retry attempt
+                        headers = {}
+                        wait_time = self._reserve_request_slot()
+                        if wait_time > 0:
+                            await asyncio.sleep(wait_time)
+                        response = await client.get(url, headers=headers)
+                except httpx.RequestError as e:
+                    if attempt < max_retries - 1:
+                        wait_time = self._retry_delay(attempt)
+                        logger.warning(f"Request error for {url}, retrying in {wait_time:.1f}s: {e}")
+                        await asyncio.sleep(wait_time)
+                        continue
+                    logger.error(f"Request error for {url}: {e}")
+                    raise
+                
+                if response.status_code == 429 and attempt < max_retries - 1:
+                    wait_time = self._retry_delay(attempt, response)
+                    logger.warning(
+                        f"Rate limited (429) for {endpoint}. "
+                        f"Retrying in {wait_time:.1f} seconds (attempt {attempt + 1}/{max_retries})"
+                    )
+                    await asyncio.sleep(wait_time)
+                    continue
+                
+                self._raise_for_status(response, url)
+                return orjson.loads(response.content), response
+        
+        # Should not reach here, but just in case
+        raise Exception(f"Failed to make request to {url} after {max_retries} attempts")
+    
+    async def get_many_async(self, endpoints: List[str], concurrency: int = 4) -> Dict[str, Dict[str, Any]]:
+        """Fetch several independent endpoints concurrently.
+        
+        Cached endpoints are served from the cache; the rest are requested in
+        parallel (bounded by ``concurrency`` and the rate limit), revalidating
+        expired entries like _make_request(), and cached in a single batch.
+        Must run on the client's own event loop; use get_many() otherwise.
+        
+        Args:
+            endpoints: API endpoint paths
+            concurrency: Maximum number of requests in flight
+            
+        Returns:
+            Dictionary mapping each (canonical) endpoint to its JSON response data
+        """
+        endpoints = list(dict.fromkeys(map(self._canonical_endpoint, endpoints)))
+        results = self.cache.get_many(endpoints) if self.use_cache else {}
+        pending = [endpoint for endpoint in endpoints if endpoint not in results]
+        logger.debug(f"Cache hits: {len(results)}/{len(endpoints)} endpoints")
+        
+        if not pending:
+            return results
+        
+        semaphore = asyncio.Semaphore(concurrency)
+        fetched = await asyncio.gather(*(
+            self._make_request_async(
+                endpoint, semaphore, self._conditional_headers(endpoint) if self.use_cache else {}
+            )
+            for endpoint in pending
+        ))
+        
+        if self.use_cache:
+            with self.cache.batch():
+                for endpoint, (data, response) in zip(pending, fetched):
+                    if response is not None:
+                        self._cache_response(endpoint, data, self._cache_ttl_for(endpoint), response)
+        
+        results.update((endpoint, data) for endpoint, (data, _) in zip(pending, fetched))
+        return results
+    
+    def get_many(self, endpoints: List[str], concurrency: int = 4) -> Dict[str, Dict[str, Any]]:
+        """Fetch several independent endpoints, concurrently when possible.
+        
+        Requests run on the client's background event loop. Falls back to
+        sequential requests when called from a running event loop, which
+        must not block waiting for another.
+        
+        Args:
+            endpoints: API endpoint paths
+            concurrency: Maximum number of requests in flight
+            
+        Returns:
+            Dictionary mapping each (canonical) endpoint to its JSON response data
+        """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run_coroutine_threadsafe(
+                self.get_many_async(endpoints, concurrency), self._get_loop()
+            ).result()
+        return {
+            self._canonical_endpoint(endpoint): self._make_request(endpoint)
+            for endpoint in endpoints
+        }
+    
     def get_competition_standings(self, competition_id: str = "CL") -> Dict[str, Any]:
         """Get standings for a competition.
         
@@ -188,6 +600,20 @@ class APIClient:
         """
         return self._make_request(f"competitions/{competition_id}/matches")
     
+    def get_standings_and_matches(self, competition_id: str = "CL") -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Get standings and matches for a competition with concurrent requests.
+        
+        Args:
+            competition_id: Competition ID (default: "CL" for Champions League)
+            
+        Returns:
+            Tuple of (standings data, matches data)
+        """
+        standings_endpoint = f"competitions/{competition_id}/standings"
+        matches_endpoint = f"competitions/{competition_id}/matches"
+        results = self.get_many([standings_endpoint, matches_endpoint])
+        return results[standings_endpoint], results[matches_endpoint]
+    
     def get_team(self, team_id: int) -> Dict[str, Any]:
         """Get team information.
         
@@ -199,6 +625,23 @@ class APIClient:
         """
         return self._make_request(f"teams/{team_id}")
     
+    def get_teams(self, team_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+        """Get information for several teams.
+        
+        Cached teams are read in one cache query; only the rest are requested.
+        
+        Args:
+            team_ids: Team IDs
+            
+        Returns:
+            Dictionary mapping team ID to team data
+        """
+        endpoints = {f"teams/{team_id}": team_id for team_id in team_ids}
+        return {
+            endpoints[endpoint]: data
+            for endpoint, data in self.get_many(list(endpoints)).items()
+        }
+    
     def get_competition_matches_by_stage(self, competition_id: str = "CL", stage: Optional[str] = None) -> Dict[str, Any]:
         """Get matches for a competition, optionally filtered by stage.
         
@@ -209,10 +652,9 @@ class APIClient:
         Returns:
             Matches data
         """
-        endpoint = f"competitions/{competition_id}/matches"
-        if stage:
-            endpoint += f"?stage={stage}"
-        return self._make_request(endpoint)
+        return self._make_request(
+            self._build_endpoint(f"competitions/{competition_id}/matches", stage=stage or None)
+        )
     
     def get_competition_matches_by_round(self, competition_id: str = "CL", round_filter: Optional[str] = None) -> Dict[str, Any]:
         """Get matches for a competition, optionally filtered by round.
@@ -224,10 +666,9 @@ class APIClient:
         Returns:
             Matches data
         """
-        endpoint = f"competitions/{competition_id}/matches"
-        if round_filter:
-            endpoint += f"?round={round_filter}"
-        return self._make_request(endpoint)
+        return self._make_request(
+            self._build_endpoint(f"competitions/{competition_id}/matches", round=round_filter or None)
+        )
     
     def get_competition_matches_by_season(self, competition_id: str = "CL", season: Optional[int] = None) -> Dict[str, Any]:
         """Get matches for a competition from a specific season.
@@ -239,8 +680,7 @@ class APIClient:
         Returns:
             Matches data
         """
-        endpoint = f"competitions/{competition_id}/matches"
-        if season:
-            endpoint += f"?season={season}"
-        return self._make_request(endpoint)
+        return self._make_request(
+            self._build_endpoint(f"competitions/{competition_id}/matches", season=season or None)
+        )
 
@@ -1,7 +1,16 @@
 """Service for fetching and storing match and standings data."""
+import hashlib
 import logging
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager, nullcontext
 from datetime import datetime
-from typing import Dict, Any, List
+from functools import lru_cache
+from typing import Dict, Any, List, Optional, Set
+import duckdb
+import orjson
 from backend.database import Database
 from backend.api_client import APIClient
 from backend.github_data_fetcher import GitHubDataFetcher
@@ -10,6 +19,265 @@ from backend.team_matcher import TeamMatcher
 
 logger = logging.getLogger(__name__)
 
+# Errors caused by the values in a row (constraint violations, bad types)
+# rather than by the statement or the connection
+_ROW_ERRORS = (duckdb.IntegrityError, duckdb.DataError)
+
+_TEAM_INSERT_SQL = "INSERT INTO teams (id, name, code, crest) VALUES"
+_TEAM_CONFLICT_SQL = """
+    ON CONFLICT (id) DO UPDATE SET
+        name = excluded.name,
+        code = excluded.code,
+        crest = excluded.crest
+"""
+
+_STANDINGS_INSERT_SQL = """
+    INSERT INTO standings (
+        team_id, position, played, won, drawn, lost,
+        goals_for, goals_against, goal_difference, points, last_updated
+    )
+    VALUES
+"""
+_STANDINGS_CONFLICT_SQL = """
+    ON CONFLICT (team_id) DO UPDATE SET
+        position = excluded.position,
+        played = excluded.played,
+        won = excluded.won,
+        drawn = excluded.drawn,
+        lost = excluded.lost,
+        goals_for = excluded.goals_for,
+        goals_against = excluded.goals_against,
+        goal_difference = excluded.goal_difference,
+        points = excluded.points,
+        last_updated = excluded.last_updated
+"""
+
+# Column order of the match tuples passed to _bulk_upsert_matches()
+_MATCH_COLUMNS = (
+    "id", "home_team_id", "away_team_id", "home_score", "away_score",
+    "matchday", "date", "status", "stage", "round", "group_name", "competition_id"
+)
+_MATCH_INSERT_SQL = f"INSERT INTO matches ({', '.join(_MATCH_COLUMNS)}) VALUES"
+_MATCH_CONFLICT_SQL = """
+    ON CONFLICT (id) DO UPDATE SET
+        home_score = excluded.home_score,
+        away_score = excluded.away_score,
+        matchday = excluded.matchday,
+        date = excluded.date,
+        status = excluded.status,
+        stage = excluded.stage,
+        round = excluded.round,
+        group_name = excluded.group_name,
+        competition_id = excluded.competition_id
+"""
+
+# Constraint-free session table used to stage bulk match writes (see
+# DataService._staged_match_writes); merged into matches in one statement
+_MATCH_STAGE_TABLE_SQL = f"""
+    CREATE TEMP TABLE IF NOT EXISTS matches_stage AS
+    SELECT {', '.join(_MATCH_COLUMNS)} FROM matches LIMIT 0
+"""
+_MATCH_STAGE_INSERT_SQL = "INSERT INTO matches_stage VALUES"
+_MATCH_STAGE_MERGE_SQL = f"""
+    INSERT INTO matches ({', '.join(_MATCH_COLUMNS)})
+    SELECT {', '.join(_MATCH_COLUMNS)} FROM matches_stage
+    {_MATCH_CONFLICT_SQL}
+"""
+
+# Stored matches with the given ids, in _MATCH_COLUMNS order
+_MATCH_SELECT_BY_IDS_SQL = f"""
+    SELECT {', '.join(_MATCH_COLUMNS)} FROM matches
+    WHERE id IN (SELECT UNNEST(?::INTEGER[]))
+"""
+
+# Rows written per multi-row INSERT statement
+UPSERT_CHUNK_SIZE = 500
+
+# Concurrent API requests during the historical sync
+API_FETCH_WORKERS = 4
+
+# Season files read and parsed concurrently during the historical sync
+GITHUB_PARSE_WORKERS = 4
+
+# European competitions covered by the historical sync
+# Note: Conference League code is "UCL" in football-data.org API (not "EC")
+_EURO_COMPS = (
+    ("CL", "Champions League"),
+    ("EL", "Europa League"),
+    ("UCL", "Conference League"),
+)
+
+# Knockout round keywords in openfootball round names, mapped to the
+# matchday and approximate date (month-day of the season's second year)
+# used for GitHub matches. The leftmost keyword wins, so "Quarter-finals"
+# is a quarter-final and not a final.
+_ROUND_RE = re.compile(r"round of 16|last 16|quarter|semi|final", re.IGNORECASE)
+_ROUND_TABLE = {
+    "round of 16": (7, "02-15"),  # Mid-February
+    "last 16": (7, "02-15"),
+    "quarter": (8, "04-01"),  # Early April
+    "semi": (9, "04-25"),  # Late April
+    "final": (10, "05-28"),  # Late May
+}
+
+
+@lru_cache(maxsize=32)
+def _multi_row_sql(insert_sql: str, conflict_sql: str, column_count: int, row_count: int) -> str:
+    """Build a multi-row INSERT statement for a chunk size.
+    
+    Every full chunk has the same size, so the statement text is built once
+    and reused instead of being re-joined for each chunk and each sync.
+    
+    Args:
+        insert_sql: Statement up to and including VALUES
+        conflict_sql: Trailing ON CONFLICT clause (may be empty)
+        column_count: Number of values per row
+        row_count: Number of rows in the VALUES list
+        
+    Returns:
+        SQL statement with row_count placeholder groups
+    """
+    row_placeholder = "(" + ", ".join("?" * column_count) + ")"
+    placeholders = ", ".join([row_placeholder] * row_count)
+    return f"{insert_sql} {placeholders} {conflict_sql}"
+
+
+# Shared stand-in for missing nested objects in API payloads; never mutated
+_EMPTY: Dict[str, Any] = {}
+
+
+def _name_of(value: Any, key: str) -> Optional[str]:
+    """Get a display name from an API field that may be a string or an object.
+    
+    Args:
+        value: Field value, e.g. match["round"] or match["group"]
+        key: Fallback key used by the object form (e.g. "round")
+        
+    Returns:
+        The name, or None
+    """
+    if isinstance(value, dict):
+        return value.get("name") or value.get(key)
+    return value
+
+
+def _team_to_row(team: Dict[str, Any]) -> tuple:
+    """Convert an API team object to a teams row tuple.
+    
+    Args:
+        team: Team object from football-data.org
+        
+    Returns:
+        Row tuple (id, name, code, crest)
+    """
+    get = team.get
+    # Prefer tla (3-letter code), fallback to shortName, then None
+    return (get("id"), get("name"), get("tla") or get("shortName"), get("crest"))
+
+
+def _match_to_row(match: Dict[str, Any], competition_id: str) -> Optional[tuple]:
+    """Convert an API match object to a tuple in _MATCH_COLUMNS order.
+    
+    Args:
+        match: Match object from football-data.org
+        competition_id: Competition ID stored with the match
+        
+    Returns:
+        Row tuple, or None if the match lacks its id or either team id
+    """
+    # Called once per match on every sync; look the get methods up once
+    get = match.get
+    match_id = get("id")
+    home_team_id = (get("homeTeam") or _EMPTY).get("id")
+    away_team_id = (get("awayTeam") or _EMPTY).get("id")
+    if not match_id or not home_team_id or not away_team_id:
+        return None
+    
+    full_time_get = ((get("score") or _EMPTY).get("fullTime") or _EMPTY).get
+    return (
+        match_id,
+        home_team_id,
+        away_team_id,
+        full_time_get("home"),
+        full_time_get("away"),
+        get("matchday"),
+        get("utcDate"),
+        get("status"),
+        get("stage"),
+        _name_of(get("round"), "round"),  # Can be a string or object
+        _name_of(get("group"), "group"),
+        competition_id
+    )
+
+
+def _synthetic_match_id(competition_id: str, home_team_id: int, away_team_id: int,
+                        match_date: Optional[str]) -> int:
+    """Derive a stable ID for a match that has no football-data.org ID.
+    
+    The ID is a digest of the match's identity, so re-importing the same
+    season updates the existing rows instead of adding duplicates (the
+    built-in hash() of a string changes between interpreter runs).
+    
+    Args:
+        competition_id: Competition ID
+        home_team_id: Home team ID
+        away_team_id: Away team ID
+        match_date: Match date from the source data, if any
+        
+    Returns:
+        Negative 9-digit ID, which cannot collide with API match IDs
+    """
+    key = f"{competition_id}|{home_team_id}|{away_team_id}|{match_date or ''}"
+    digest = hashlib.blake2b(key.encode(), digest_size=8).digest()
+    # matches.id is a 32-bit INTEGER
+    return -(int.from_bytes(digest, "big") % (10 ** 9))
+
+
+def _standing_to_row(entry: Dict[str, Any], last_updated: str) -> Optional[tuple]:
+    """Convert an API standings table entry to a standings row tuple.
+    
+    Args:
+        entry: Table entry from football-data.org standings
+        last_updated: Timestamp stored with the row
+        
+    Returns:
+        Row tuple, or None if the entry lacks a team id
+    """
+    get = entry.get
+    team_id = (get("team") or _EMPTY).get("id")
+    if not team_id:
+        return None
+    
+    return (
+        team_id,
+        get("position"),
+        get("playedGames", 0),
+        get("won", 0),
+        get("draw", 0),
+        get("lost", 0),
+        get("goalsFor", 0),
+        get("goalsAgainst", 0),
+        get("goalDifference", 0),
+        get("points", 0),
+        last_updated
+    )
+
+
+def _standing_entries(standings_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Flatten the table entries of all standings groups.
+    
+    Args:
+        standings_data: Standings response
+        
+    Returns:
+        Table entries of every group
+    """
+    return [
+        entry
+        for group in standings_data.get("standings", []) if "table" in group
+        for entry in group["table"]
+    ]
+
 
 class DataService:
     """Service for data ingestion and storage."""
@@ -24,229 +292,276 @@ class DataService:
         self.db = db
         self.api_client = api_client
         self.github_fetcher = GitHubDataFetcher(cache_dir="./data/github_cache")
-        self.txt_parser = FootballTxtParser()
         self.team_matcher = TeamMatcher(db)
+        # The staging table is TEMP, so it only exists on the connection of
+        # the thread that created it; staging is tracked per thread too
+        self._local = threading.local()
+        # competition_id -> (payload fingerprint, stored match count) of the last sync_all
+        self._synced: Dict[str, tuple] = {}
+    
+    @property
+    def _staging_matches(self) -> bool:
+        """Whether the calling thread is inside _staged_match_writes()."""
+        return getattr(self._local, "staging_matches", False)
+    
+    @_staging_matches.setter
+    def _staging_matches(self, staging: bool):
+        self._local.staging_matches = staging
+    
+    @contextmanager
+    def _staged_match_writes(self):
+        """Route match upserts through a session staging table.
+        
+        Inside the block each _bulk_upsert_matches() call loads its rows into
+        a constraint-free temporary table and merges them into matches with a
+        single INSERT ... SELECT, so conflicts are resolved in one pass instead
+        of per VALUES chunk. Meant for backfills writing many seasons. Only
+        the calling thread's writes are staged.
+        """
+        self.db.execute(_MATCH_STAGE_TABLE_SQL)
+        self._staging_matches = True
+        try:
+            yield
+        finally:
+            self._staging_matches = False
+            self.db.execute("DROP TABLE IF EXISTS matches_stage")
+    
+    def _upsert_row_by_row(self, sql: str, rows: List[tuple], label: str) -> int:
+        """Write rows one at a time, skipping those the database rejects.
+        
+        Fallback for a failed batch: isolates the offending rows so the rest
+        are still stored.
+        
+        Args:
+            sql: Single-row upsert statement
+            rows: Parameter tuples, each starting with the row's id
+            label: Row kind used in log messages (e.g. "match")
+            
+        Returns:
+            Number of rows written
+        """
+        written = 0
+        for row in rows:
+            try:
+                self.db.execute(sql, row)
+                written += 1
+            except _ROW_ERRORS as e:
+                logger.debug(f"Skipping {label} {row[0]}: {e}")
+        return written
+    
+    def _upsert_batch(self, insert_sql: str, conflict_sql: str, rows: List[tuple], label: str) -> int:
+        """Insert or update rows with chunked multi-row INSERTs.
+        
+        All chunks are written in one transaction. If the batch is rejected it
+        is rolled back and the rows are retried one at a time, so only the
+        offending rows are skipped. Inside an enclosing transaction the error
+        is raised instead, since DuckDB aborts the whole transaction on a
+        failed statement and the retries could not succeed.
+        
+        Args:
+            insert_sql: Statement up to and including VALUES
+            conflict_sql: ON CONFLICT clause applied to every row
+            rows: Parameter tuples, each starting with the row's id
+            label: Row kind used in log messages (e.g. "team")
+            
+        Returns:
+            Number of rows written
+        """
+        # A repeated id in one statement is ambiguous; the last row wins
+        rows = list({row[0]: row for row in rows}.values())
+        if not rows:
+            return 0
+        
+        column_count = len(rows[0])
+        try:
+            with self.db.transaction():
+                for start in range(0, len(rows), UPSERT_CHUNK_SIZE):
+                    chunk = rows[start:start + UPSERT_CHUNK_SIZE]
+                    self.db.execute(
+                        _multi_row_sql(insert_sql, conflict_sql, column_count, len(chunk)),
+                        tuple(value for row in chunk for value in row)
+                    )
+        except _ROW_ERRORS as e:
+            if self.db.in_transaction():
+                raise
+            logger.debug(f"Batch upsert of {len(rows)} {label}s failed, retrying row by row: {e}")
+            return self._upsert_row_by_row(
+                _multi_row_sql(insert_sql, conflict_sql, column_count, 1), rows, label
+            )
+        return len(rows)
+    
+    def _upsert_teams(self, rows: List[tuple]) -> int:
+        """Insert or update teams in a single transaction.
+        
+        Args:
+            rows: (id, name, code, crest) tuples
+            
+        Returns:
+            Number of teams written
+        """
+        return self._upsert_batch(_TEAM_INSERT_SQL, _TEAM_CONFLICT_SQL, rows, "team")
+    
+    def _bulk_upsert_matches(self, rows: List[tuple]) -> int:
+        """Insert or update matches with chunked multi-row INSERTs.
+        
+        Outside _staged_match_writes() this is _upsert_batch() on matches.
+        Inside it, the rows are loaded into the staging table and merged
+        into matches with one statement, in the same transaction, with the
+        same per-row fallback if the batch is rejected (e.g. a row
+        references an unknown team).
+        
+        Args:
+            rows: Match tuples in _MATCH_COLUMNS order
+            
+        Returns:
+            Number of matches written
+        """
+        if not self._staging_matches:
+            return self._upsert_batch(_MATCH_INSERT_SQL, _MATCH_CONFLICT_SQL, rows, "match")
+        
+        # A repeated match id in one statement is ambiguous; the last row wins
+        rows = list({row[0]: row for row in rows}.values())
+        if not rows:
+            return 0
+        
+        column_count = len(_MATCH_COLUMNS)
+        try:
+            with self.db.transaction():
+                for start in range(0, len(rows), UPSERT_CHUNK_SIZE):
+                    chunk = rows[start:start + UPSERT_CHUNK_SIZE]
+                    self.db.execute(
+                        _multi_row_sql(_MATCH_STAGE_INSERT_SQL, "", column_count, len(chunk)),
+                        tuple(value for row in chunk for value in row)
+                    )
+                self.db.execute(_MATCH_STAGE_MERGE_SQL)
+                self.db.execute("DELETE FROM matches_stage")
+        except _ROW_ERRORS as e:
+            if self.db.in_transaction():
+                raise
+            logger.debug(f"Batch upsert of {len(rows)} matches failed, retrying row by row: {e}")
+            return self._upsert_row_by_row(
+                _multi_row_sql(_MATCH_INSERT_SQL, _MATCH_CONFLICT_SQL, column_count, 1), rows, "match"
+            )
+        return len(rows)
+    
+    def _changed_match_rows(self, rows: List[tuple]) -> List[tuple]:
+        """Drop match rows that are already stored with identical values.
+        
+        Historical seasons rarely change, so a repeated import would
+        otherwise rewrite every row to the same values.
+        
+        Args:
+            rows: Match tuples in _MATCH_COLUMNS order
+            
+        Returns:
+            The rows that are new or differ from the stored match
+        """
+        if not rows:
+            return rows
+        stored = set(self.db.fetchall(_MATCH_SELECT_BY_IDS_SQL, ([row[0] for row in rows],)))
+        return [row for row in rows if row not in stored]
     
-    def sync_teams(self, competition_id: str = "CL"):
+    def sync_teams(self, competition_id: str = "CL",
+                   standings_data: Optional[Dict[str, Any]] = None,
+                   matches_data: Optional[Dict[str, Any]] = None):
         """Sync teams from API to database.
         
         Args:
             competition_id: Competition ID
+            standings_data: Already fetched standings (fetched if omitted)
+            matches_data: Already fetched matches (fetched if omitted)
         """
-        standings_data = self.api_client.get_competition_standings(competition_id)
+        if standings_data is None:
+            standings_data = self.api_client.get_competition_standings(competition_id)
         
         # Extract teams from standings
-        teams = set()
+        team_entries = []
         if "standings" in standings_data:
             for group in standings_data["standings"]:
                 if "table" in group:
                     for entry in group["table"]:
-                        team = entry.get("team", {})
-                        # Prefer tla (3-letter code), fallback to shortName, then None
-                        code = team.get("tla") or team.get("shortName")
-                        teams.add((
-                            team.get("id"),
-                            team.get("name"),
-                            code,
-                            team.get("crest")
-                        ))
+                        team_entries.append(entry.get("team") or _EMPTY)
         
         # Also get teams from matches
-        matches_data = self.api_client.get_competition_matches(competition_id)
+        if matches_data is None:
+            matches_data = self.api_client.get_competition_matches(competition_id)
         if "matches" in matches_data:
             for match in matches_data["matches"]:
-                home_team = match.get("homeTeam", {})
-                away_team = match.get("awayTeam", {})
-                
-                # Prefer tla, fallback to shortName
-                home_code = home_team.get("tla") or home_team.get("shortName")
-                away_code = away_team.get("tla") or away_team.get("shortName")
-                
-                teams.add((
-                    home_team.get("id"),
-                    home_team.get("name"),
-                    home_code,
-                    home_team.get("crest")
-                ))
-                teams.add((
-                    away_team.get("id"),
-                    away_team.get("name"),
-                    away_code,
-                    away_team.get("crest")
-                ))
+                team_entries.append(match.get("homeTeam") or _EMPTY)
+                team_entries.append(match.get("awayTeam") or _EMPTY)
         
-        # Insert or update teams
-        teams_inserted = 0
+        # Deduplicate by id. Standings entries come first and win; later
+        # entries for the same team only fill in fields that are still missing
+        teams: Dict[int, tuple] = {}
         teams_skipped = 0
-        
-        for team_id, name, code, crest in teams:
+        for team in team_entries:
+            row = _team_to_row(team)
+            team_id = row[0]
             if not team_id:
                 teams_skipped += 1
                 continue
-            
-            try:
-                self.db.execute("""
-                    INSERT INTO teams (id, name, code, crest)
-                    VALUES (?, ?, ?, ?)
-                    ON CONFLICT (id) DO UPDATE SET
-                        name = excluded.name,
-                        code = excluded.code,
-                        crest = excluded.crest
-                """, (team_id, name, code, crest))
-                teams_inserted += 1
-            except Exception as e:
-                logger.warning(f"Skipping team {team_id}: {e}")
-                teams_skipped += 1
+            known = teams.get(team_id)
+            if known:
+                row = tuple(old if old is not None else new for old, new in zip(known, row))
+            teams[team_id] = row
+        
+        # Insert or update teams
+        teams_inserted = self._upsert_teams(list(teams.values()))
+        teams_skipped += len(teams) - teams_inserted
         
-        self.db.commit()
         logger.info(f"Synced {teams_inserted} teams, skipped {teams_skipped} invalid teams")
     
-    def sync_matches(self, competition_id: str = "CL"):
+    def sync_matches(self, competition_id: str = "CL",
+                     matches_data: Optional[Dict[str, Any]] = None) -> Set[int]:
         """Sync matches from API to database.
         
         Args:
             competition_id: Competition ID
+            matches_data: Already fetched matches (fetched if omitted)
+            
+        Returns:
+            IDs of the valid matches that were upserted
         """
-        matches_data = self.api_client.get_competition_matches(competition_id)
+        if matches_data is None:
+            matches_data = self.api_client.get_competition_matches(competition_id)
         
         if "matches" not in matches_data:
-            return
+            return set()
         
-        matches_inserted = 0
-        matches_skipped = 0
+        # Matches with missing team IDs are skipped
+        rows = [row for row in (_match_to_row(match, competition_id)
+                                for match in matches_data["matches"]) if row]
+        matches_skipped = len(matches_data["matches"]) - len(rows)
         
-        for match in matches_data["matches"]:
-            match_id = match.get("id")
-            home_team = match.get("homeTeam", {})
-            away_team = match.get("awayTeam", {})
-            score = match.get("score", {})
-            full_time = score.get("fullTime", {})
-            
-            # Validate required fields
-            home_team_id = home_team.get("id")
-            away_team_id = away_team.get("id")
-            
-            # Skip matches with missing team IDs
-            if not match_id or not home_team_id or not away_team_id:
-                matches_skipped += 1
-                continue
-            
-            try:
-                # Extract stage, round, and group information from match
-                stage = match.get("stage")
-                round_info = match.get("round")  # Can be a string or object
-                if isinstance(round_info, dict):
-                    round_name = round_info.get("name") or round_info.get("round")
-                else:
-                    round_name = round_info
-                
-                group_info = match.get("group")
-                if isinstance(group_info, dict):
-                    group_name = group_info.get("name") or group_info.get("group")
-                else:
-                    group_name = group_info
-                
-                self.db.execute("""
-                    INSERT INTO matches (
-                        id, home_team_id, away_team_id, home_score, away_score,
-                        matchday, date, status, stage, round, group_name, competition_id
-                    )
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    ON CONFLICT (id) DO UPDATE SET
-                        home_score = excluded.home_score,
-                        away_score = excluded.away_score,
-                        status = excluded.status,
-                        stage = excluded.stage,
-                        round = excluded.round,
-                        group_name = excluded.group_name,
-                        competition_id = excluded.competition_id
-                """, (
-                    match_id,
-                    home_team_id,
-                    away_team_id,
-                    full_time.get("home"),
-                    full_time.get("away"),
-                    match.get("matchday"),
-                    match.get("utcDate"),
-                    match.get("status"),
-                    stage,
-                    round_name,
-                    group_name,
-                    competition_id
-                ))
-                matches_inserted += 1
-            except Exception as e:
-                # Log error but continue with other matches
-                logger.warning(f"Skipping match {match_id}: {e}")
-                matches_skipped += 1
-        
-        self.db.commit()
+        matches_inserted = self._bulk_upsert_matches(rows)
+        matches_skipped += len(rows) - matches_inserted
         logger.info(f"Synced {matches_inserted} matches, skipped {matches_skipped} invalid matches")
+        return {row[0] for row in rows}
     
-    def sync_standings(self, competition_id: str = "CL"):
+    def sync_standings(self, competition_id: str = "CL",
+                       standings_data: Optional[Dict[str, Any]] = None):
         """Sync standings from API to database.
         
         Args:
             competition_id: Competition ID
+            standings_data: Already fetched standings (fetched if omitted)
         """
-        standings_data = self.api_client.get_competition_standings(competition_id)
+        if standings_data is None:
+            standings_data = self.api_client.get_competition_standings(competition_id)
         
         if "standings" not in standings_data:
             return
         
+        entries = _standing_entries(standings_data)
         now = datetime.utcnow().isoformat()
-        standings_inserted = 0
-        standings_skipped = 0
-        
-        for group in standings_data["standings"]:
-            if "table" not in group:
-                continue
-            
-            for entry in group["table"]:
-                team = entry.get("team", {})
-                team_id = team.get("id")
-                
-                if not team_id:
-                    standings_skipped += 1
-                    continue
-                
-                try:
-                    self.db.execute("""
-                        INSERT INTO standings (
-                            team_id, position, played, won, drawn, lost,
-                            goals_for, goals_against, goal_difference, points, last_updated
-                        )
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                            ON CONFLICT (team_id) DO UPDATE SET
-                                position = excluded.position,
-                                played = excluded.played,
-                                won = excluded.won,
-                                drawn = excluded.drawn,
-                                lost = excluded.lost,
-                                goals_for = excluded.goals_for,
-                                goals_against = excluded.goals_against,
-                                goal_difference = excluded.goal_difference,
-                                points = excluded.points,
-                                last_updated = excluded.last_updated
-                    """, (
-                        team_id,
-                        entry.get("position"),
-                        entry.get("playedGames", 0),
-                        entry.get("won", 0),
-                        entry.get("draw", 0),
-                        entry.get("lost", 0),
-                        entry.get("goalsFor", 0),
-                        entry.get("goalsAgainst", 0),
-                        entry.get("goalDifference", 0),
-                        entry.get("points", 0),
-                        now
-                    ))
-                    standings_inserted += 1
-                except Exception as e:
-                    logger.warning(f"Skipping standings for team {team_id}: {e}")
-                    standings_skipped += 1
+        # Entries without a team ID are skipped
+        rows = [row for row in (_standing_to_row(entry, now) for entry in entries) if row]
+        standings_skipped = len(entries) - len(rows)
         
-        self.db.commit()
+        standings_inserted = self._upsert_batch(
+            _STANDINGS_INSERT_SQL, _STANDINGS_CONFLICT_SQL, rows, "standing"
+        )
+        standings_skipped += len(rows) - standings_inserted
         logger.info(f"Synced {standings_inserted} standings, skipped {standings_skipped} invalid entries")
     
     def sync_historical_matches(self, years_back: int = 10, delay_between_requests: float = 3.0):
@@ -259,246 +574,246 @@ class DataService:
         
         Args:
             years_back: Number of years to look back (default: 10)
-            delay_between_requests: Delay in seconds between API requests (default: 3.0)
+            delay_between_requests: Minimum spacing in seconds between the starts of
+                API requests, which may overlap (default: 3.0)
         """
-        from datetime import datetime
-        import time
-        
-        current_year = datetime.now().year
-        current_season_start = current_year if datetime.now().month >= 8 else current_year - 1
-        
-        # European competition IDs
-        # Note: Conference League code is "UCL" in football-data.org API (not "EC")
-        competitions = {
-            "CL": "Champions League",
-            "EL": "Europa League",
-            "UCL": "Conference League"
-        }
+        now = datetime.now()
+        current_season_start = now.year if now.month >= 8 else now.year - 1
         
         logger.info(f"Starting historical data sync for {years_back} years")
         
-        # Count how many seasons we actually need to fetch
-        seasons_to_fetch = []
-        for comp_id, comp_name in competitions.items():
-            for year_offset in range(years_back + 1):
-                season_year = current_season_start - year_offset
-                season_start = f"{season_year}-08-01"
-                season_end = f"{season_year + 1}-07-31"
-                
-                existing_count = self.db.fetchone("""
-                    SELECT COUNT(*) 
-                    FROM matches 
-                    WHERE competition_id = ?
-                    AND date >= ?
-                    AND date <= ?
-                """, (comp_id, season_start, season_end))
-                
-                existing_matches = existing_count[0] if existing_count else 0
-                
-                # Consider a season complete if we have at least 50 matches (reasonable threshold)
-                # This accounts for partial data or incomplete seasons
-                if existing_matches < 50:
-                    # Determine if this is current season (use API) or historical (use GitHub)
-                    is_current_season = (season_year == current_season_start)
-                    seasons_to_fetch.append((comp_id, comp_name, season_year, is_current_season))
+        # Count stored matches per competition and season (August-July) in one query
+        placeholders = ", ".join("?" * len(_EURO_COMPS))
+        existing_counts = {
+            (comp_id, season_year): count
+            for comp_id, season_year, count in self.db.fetchall(f"""
+                SELECT competition_id,
+                       CASE WHEN substr(date, 6, 2) >= '08'
+                            THEN CAST(substr(date, 1, 4) AS INTEGER)
+                            ELSE CAST(substr(date, 1, 4) AS INTEGER) - 1
+                       END AS season_year,
+                       COUNT(*)
+                FROM matches
+                WHERE competition_id IN ({placeholders})
+                AND date >= ?
+                GROUP BY competition_id, season_year
+            """, (*(comp_id for comp_id, _ in _EURO_COMPS), f"{current_season_start - years_back}-08-01"))
+        }
+        
+        # Count how many seasons we actually need to fetch. A season is considered
+        # complete with at least 50 matches (reasonable threshold), which accounts
+        # for partial data or incomplete seasons. The current season comes from
+        # the API, older ones from GitHub.
+        season_years = range(current_season_start, current_season_start - years_back - 1, -1)
+        seasons_to_fetch = [
+            (comp_id, comp_name, season_year, season_year == current_season_start)
+            for comp_id, comp_name in _EURO_COMPS
+            for season_year in season_years
+            if existing_counts.get((comp_id, season_year), 0) < 50
+        ]
         
         total_seasons = len(seasons_to_fetch)
         logger.info(f"Found {total_seasons} seasons to fetch")
         
+        api_seasons = [season for season in seasons_to_fetch if season[3]]
+        github_seasons = [season for season in seasons_to_fetch if not season[3]]
+        
+        # Connect to the API host in the background while the repository clones
+        warmup = threading.Thread(target=self.api_client.warmup) if api_seasons else None
+        if warmup:
+            warmup.start()
+        
         # Clone GitHub repository once for all historical seasons
         github_cloned = False
         try:
-            # Check if we need GitHub data
-            has_historical_seasons = any(not is_current for _, _, _, is_current in seasons_to_fetch)
-            
-            if has_historical_seasons:
+            if github_seasons:
                 logger.info("Cloning GitHub repository for historical data...")
-                self.github_fetcher.clone_repository()
+                # Only the directories of the seasons still missing are checked out
+                self.github_fetcher.clone_repository(paths=sorted({
+                    f"{season_year}-{str(season_year + 1)[-2:]}" for _, _, season_year, _ in github_seasons
+                }))
                 github_cloned = True
                 logger.info("GitHub repository cloned successfully")
         except Exception as e:
             logger.error(f"Failed to clone GitHub repository: {e}")
             logger.warning("Will skip historical seasons that require GitHub data")
         
-        try:
-            for idx, (comp_id, comp_name, season_year, is_current) in enumerate(seasons_to_fetch):
+        if warmup:
+            warmup.join()
+        
+        # API requests run in a small pool, their starts spaced at least
+        # delay_between_requests apart. Match writes stay on this thread; the
+        # workers only write API responses to the cache, which uses its own
+        # per-thread cursors and so never joins this thread's transactions
+        pacing_lock = threading.Lock()
+        next_request_at = time.monotonic()
+        
+        def fetch_season(comp_id: str, season_year: int) -> Dict[str, Any]:
+            nonlocal next_request_at
+            with pacing_lock:
+                wait = next_request_at - time.monotonic()
+                next_request_at = max(next_request_at, time.monotonic()) + delay_between_requests
+            if wait > 0:
+                time.sleep(wait)
+            return self.api_client.get_competition_matches_by_season(comp_id, season_year)
+        
+        # Seasons are written back to back; defer checkpoints and index
+        # maintenance until the end
+        with self.db.bulk_load(), self.db.without_indexes("matches"), self._staged_match_writes(), \
+                ThreadPoolExecutor(max_workers=API_FETCH_WORKERS) as pool, \
+                ThreadPoolExecutor(max_workers=GITHUB_PARSE_WORKERS) as parse_pool:
+            futures = {
+                pool.submit(fetch_season, comp_id, season_year): (comp_id, comp_name, season_year)
+                for comp_id, comp_name, season_year, _ in api_seasons
+            }
+            
+            # GitHub seasons are parsed in parallel while the API requests are
+            # in flight, and stored here one at a time as they become ready
+            try:
+                if github_cloned:
+                    parsed = {
+                        parse_pool.submit(self._parse_github_season, comp_id, comp_name, season_year):
+                            (comp_id, comp_name, season_year)
+                        for comp_id, comp_name, season_year, _ in github_seasons
+                    }
+                else:
+                    parsed = {}
+                    for comp_id, comp_name, season_year, _ in github_seasons:
+                        logger.warning(f"Skipping {comp_name} season {season_year}/{season_year+1} - GitHub repo not available")
+                
+                for future in as_completed(parsed):
+                    comp_id, comp_name, season_year = parsed.pop(future)
+                    try:
+                        parsed_data = future.result()
+                        if parsed_data:
+                            logger.info(f"Storing {comp_name} season {season_year}/{season_year+1} (historical)")
+                            self._sync_season_from_github(comp_id, comp_name, season_year, parsed_data)
+                    except Exception as e:
+                        logger.warning(f"Error syncing {comp_name} season {season_year}/{season_year+1}: {e}")
+            finally:
+                # Always cleanup GitHub repository
+                if github_cloned:
+                    logger.info("Cleaning up cloned GitHub repository...")
+                    self.github_fetcher.cleanup()
+            
+            # Drop each future once stored so only in-flight payloads stay referenced
+            for future in as_completed(futures):
+                comp_id, comp_name, season_year = futures.pop(future)
                 try:
-                    logger.info(f"Fetching {comp_name} season {season_year}/{season_year+1} ({'current' if is_current else 'historical'})")
-                    
-                    if is_current:
-                        # Use football-data.org API for current season
-                        if idx > 0:
-                            time.sleep(delay_between_requests)
-                        self._sync_season_from_api(comp_id, comp_name, season_year)
-                    else:
-                        # Use GitHub for historical seasons
-                        if not github_cloned:
-                            logger.warning(f"Skipping {comp_name} season {season_year}/{season_year+1} - GitHub repo not available")
-                            continue
-                        self._sync_season_from_github(comp_id, comp_name, season_year)
-                        
+                    logger.info(f"Storing {comp_name} season {season_year}/{season_year+1} (current)")
+                    self._sync_season_from_api(comp_id, comp_name, season_year, future.result())
                 except Exception as e:
                     error_msg = str(e)
-                    # Check if it's a rate limit error
+                    # Rate limits are already retried by the API client
                     if "429" in error_msg or "rate limit" in error_msg.lower() or "Too Many Requests" in error_msg:
-                        logger.warning(f"Rate limited for {comp_name} season {season_year}/{season_year+1}. Waiting 10 seconds before continuing...")
-                        time.sleep(10)
-                        continue
+                        logger.warning(f"Rate limited for {comp_name} season {season_year}/{season_year+1}, skipping it for now")
                     else:
                         logger.warning(f"Error syncing {comp_name} season {season_year}/{season_year+1}: {e}")
-                        time.sleep(delay_between_requests)
-                        continue
-        finally:
-            # Always cleanup GitHub repository
-            if github_cloned:
-                logger.info("Cleaning up cloned GitHub repository...")
-                self.github_fetcher.cleanup()
         
         logger.info("Historical data sync completed")
     
-    def _sync_season_from_api(self, comp_id: str, comp_name: str, season_year: int):
+    def _sync_season_from_api(self, comp_id: str, comp_name: str, season_year: int,
+                              matches_data: Optional[Dict[str, Any]] = None):
         """Sync a season from football-data.org API.
         
         Args:
             comp_id: Competition ID
             comp_name: Competition name
             season_year: Season start year
+            matches_data: Already fetched season matches (fetched if omitted)
         """
-        matches_data = self.api_client.get_competition_matches_by_season(comp_id, season_year)
+        if matches_data is None:
+            matches_data = self.api_client.get_competition_matches_by_season(comp_id, season_year)
         
         if "matches" not in matches_data:
             logger.debug(f"No matches found for {comp_name} season {season_year}/{season_year+1}")
             return
         
-        matches_inserted = 0
-        matches_skipped = 0
-        
+        # Collect valid matches and their teams, then store all teams in one batch
+        # so they exist before any match referencing them is inserted
+        rows = []
+        # Each team plays many matches; keep one row per team id
+        teams: Dict[int, tuple] = {}
         for match in matches_data["matches"]:
-            match_id = match.get("id")
-            home_team = match.get("homeTeam", {})
-            away_team = match.get("awayTeam", {})
-            
-            home_team_id = home_team.get("id")
-            away_team_id = away_team.get("id")
-            
-            if not match_id or not home_team_id or not away_team_id:
-                matches_skipped += 1
+            row = _match_to_row(match, comp_id)
+            if not row:
                 continue
             
-            # Store teams
-            try:
-                # Prefer tla (3-letter code), fallback to shortName
-                home_code = home_team.get("tla") or home_team.get("shortName")
-                away_code = away_team.get("tla") or away_team.get("shortName")
-                
-                self.db.execute("""
-                    INSERT INTO teams (id, name, code, crest)
-                    VALUES (?, ?, ?, ?)
-                    ON CONFLICT (id) DO UPDATE SET
-                        name = excluded.name,
-                        code = excluded.code,
-                        crest = excluded.crest
-                """, (
-                    home_team_id,
-                    home_team.get("name"),
-                    home_code,
-                    home_team.get("crest")
-                ))
-                self.db.execute("""
-                    INSERT INTO teams (id, name, code, crest)
-                    VALUES (?, ?, ?, ?)
-                    ON CONFLICT (id) DO UPDATE SET
-                        name = excluded.name,
-                        code = excluded.code,
-                        crest = excluded.crest
-                """, (
-                    away_team_id,
-                    away_team.get("name"),
-                    away_code,
-                    away_team.get("crest")
-                ))
-            except Exception as e:
-                logger.debug(f"Error storing teams for match {match_id}: {e}")
-            
-            # Extract match details
-            full_time = match.get("score", {}).get("fullTime", {})
-            stage = match.get("stage")
-            round_info = match.get("round")
-            if isinstance(round_info, dict):
-                round_name = round_info.get("name") or round_info.get("round")
-            else:
-                round_name = round_info
-            
-            group_info = match.get("group")
-            if isinstance(group_info, dict):
-                group_name = group_info.get("name") or group_info.get("group")
-            else:
-                group_name = group_info
-            
-            try:
-                self.db.execute("""
-                    INSERT INTO matches (
-                        id, home_team_id, away_team_id, home_score, away_score,
-                        matchday, date, status, stage, round, group_name, competition_id
-                    )
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    ON CONFLICT (id) DO UPDATE SET
-                        home_score = excluded.home_score,
-                        away_score = excluded.away_score,
-                        status = excluded.status,
-                        stage = excluded.stage,
-                        round = excluded.round,
-                        group_name = excluded.group_name,
-                        competition_id = excluded.competition_id
-                """, (
-                    match_id,
-                    home_team_id,
-                    away_team_id,
-                    full_time.get("home"),
-                    full_time.get("away"),
-                    match.get("matchday"),
-                    match.get("utcDate"),
-                    match.get("status"),
-                    stage,
-                    round_name,
-                    group_name,
-                    comp_id
-                ))
-                matches_inserted += 1
-            except Exception as e:
-                logger.debug(f"Skipping match {match_id}: {e}")
-                matches_skipped += 1
+            rows.append(row)
+            for team in (match["homeTeam"], match["awayTeam"]):
+                if team["id"] not in teams:
+                    teams[team["id"]] = _team_to_row(team)
+        matches_skipped = len(matches_data["matches"]) - len(rows)
+        
+        self._upsert_teams(list(teams.values()))
         
-        self.db.commit()
-        logger.info(f"Synced {matches_inserted} matches for {comp_name} season {season_year}/{season_year+1} from API (skipped {matches_skipped})")
+        changed = self._changed_match_rows(rows)
+        matches_inserted = self._bulk_upsert_matches(changed)
+        matches_skipped += len(changed) - matches_inserted
+        logger.info(f"Synced {matches_inserted} matches for {comp_name} season {season_year}/{season_year+1} from API ({len(rows) - len(changed)} unchanged, skipped {matches_skipped})")
     
-    def _sync_season_from_github(self, comp_id: str, comp_name: str, season_year: int):
-        """Sync a season from GitHub openfootball repository.
+    def _parse_github_season(self, comp_id: str, comp_name: str, season_year: int) -> Optional[Dict[str, Any]]:
+        """Read and parse a season file from the cloned openfootball repository.
+        
+        Safe to call from worker threads: it only reads files and parses them
+        with its own parser instance.
         
         Args:
             comp_id: Competition ID
             comp_name: Competition name
             season_year: Season start year
+            
+        Returns:
+            Parsed season data, or None if the file is missing or has no matches
         """
         # Convert season year to format used by GitHub (e.g., 2023 -> "2023-24")
         season_str = f"{season_year}-{str(season_year + 1)[-2:]}"
         
-        # Fetch file from GitHub
-        content = self.github_fetcher.fetch_season_file(season_str, comp_id)
-        if not content:
+        season_file = self.github_fetcher.open_season_file(season_str, comp_id)
+        if not season_file:
             logger.warning(f"Could not fetch {comp_name} season {season_str} from GitHub")
-            return
+            return None
         
-        # Parse the content
-        parsed_data = self.txt_parser.parse(content, competition=comp_id, season=season_str)
+        # Parse straight from the file so its content is never held as a whole;
+        # the parser keeps per-file state, so use a fresh one
+        teams = []
+        matches = []
+        with season_file:
+            for kind, value in FootballTxtParser().iter_parse(season_file, competition=comp_id, season=season_str):
+                if kind == "match":
+                    matches.append(value)
+                else:
+                    teams.append({"name": value})
         
-        if not parsed_data or not parsed_data.get("matches"):
+        if not matches:
             logger.warning(f"No matches parsed from {comp_name} season {season_str}")
-            return
+            return None
+        return {"teams": teams, "matches": matches}
+    
+    def _sync_season_from_github(self, comp_id: str, comp_name: str, season_year: int,
+                                 parsed_data: Optional[Dict[str, Any]] = None):
+        """Sync a season from GitHub openfootball repository.
+        
+        Args:
+            comp_id: Competition ID
+            comp_name: Competition name
+            season_year: Season start year
+            parsed_data: Already parsed season (parsed if omitted)
+        """
+        if parsed_data is None:
+            parsed_data = self._parse_github_season(comp_id, comp_name, season_year)
+            if not parsed_data:
+                return
         
-        matches_inserted = 0
+        season_str = f"{season_year}-{str(season_year + 1)[-2:]}"
+        # Fallback dates for matches without one, by knockout matchday
+        round_dates = {matchday: f"{season_year + 1}-{month_day}" for matchday, month_day in _ROUND_TABLE.values()}
+        group_stage_date = f"{season_year}-10-15"  # Mid-season
         matches_skipped = 0
         teams_inserted = 0
+        rows = []
+        # Team names repeat on every match; resolve each one once
+        team_ids: Dict[str, Optional[int]] = {}
         
         # Store teams first
         for team_data in parsed_data.get("teams", []):
@@ -507,56 +822,50 @@ class DataService:
                 continue
             
             try:
-                team_id = self.team_matcher.find_or_create_team_id(team_name, comp_id)
+                team_id = self.team_matcher.find_or_create_team_id_cached(team_name, comp_id, team_ids)
                 if team_id:
                     teams_inserted += 1
-            except Exception as e:
+            except duckdb.Error as e:
                 logger.debug(f"Error storing team {team_name}: {e}")
         
         # Store matches
         for match_data in parsed_data.get("matches", []):
+            get = match_data.get
             try:
-                home_team_name = match_data.get("home_team")
-                away_team_name = match_data.get("away_team")
+                home_team_name = get("home_team")
+                away_team_name = get("away_team")
                 
                 if not home_team_name or not away_team_name:
                     matches_skipped += 1
                     continue
                 
                 # Get or create team IDs
-                home_team_id = self.team_matcher.find_or_create_team_id(home_team_name, comp_id)
-                away_team_id = self.team_matcher.find_or_create_team_id(away_team_name, comp_id)
+                home_team_id = self.team_matcher.find_or_create_team_id_cached(home_team_name, comp_id, team_ids)
+                away_team_id = self.team_matcher.find_or_create_team_id_cached(away_team_name, comp_id, team_ids)
                 
                 if not home_team_id or not away_team_id:
                     matches_skipped += 1
                     continue
                 
-                # Generate synthetic match ID (negative to avoid conflicts with API IDs)
-                # Use hash of teams + date for consistency
-                match_key = f"{home_team_id}_{away_team_id}_{match_data.get('date', '')}"
-                match_id = abs(hash(match_key)) % (10 ** 9)  # 9-digit ID
-                match_id = -match_id  # Make negative to avoid conflicts
+                match_id = _synthetic_match_id(comp_id, home_team_id, away_team_id, get("date"))
+                
+                round_name = get("round")
+                round_match = _ROUND_RE.search(round_name) if round_name else None
+                round_info = _ROUND_TABLE[round_match.group().lower()] if round_match else None
                 
                 # Parse date
-                match_date = match_data.get("date")
+                match_date = get("date")
                 if not match_date:
                     # Try to infer approximate date from season and round
                     # Use a default date based on season and round
                     # This is a fallback - ideally all matches should have dates
-                    if match_data.get("round"):
-                        round_name = match_data.get("round", "").lower()
+                    if round_name:
                         # Approximate dates for knockout rounds
-                        if "round of 16" in round_name or "last 16" in round_name:
-                            match_date = f"{season_year + 1}-02-15"  # Mid-February
-                        elif "quarter" in round_name:
-                            match_date = f"{season_year + 1}-04-01"  # Early April
-                        elif "semi" in round_name:
-                            match_date = f"{season_year + 1}-04-25"  # Late April
-                        elif "final" in round_name:
-                            match_date = f"{season_year + 1}-05-28"  # Late May
+                        if round_info:
+                            match_date = round_dates[round_info[0]]
                     else:
                         # Group stage - use mid-season date
-                        match_date = f"{season_year}-10-15"
+                        match_date = group_stage_date
                     
                     if not match_date:
                         matches_skipped += 1
@@ -564,165 +873,153 @@ class DataService:
                 
                 # Determine matchday from stage/round
                 matchday = None
-                if match_data.get("stage") == "GROUP_STAGE":
+                if get("stage") == "GROUP_STAGE":
                     matchday = 1  # Default for group stage
-                elif match_data.get("round"):
+                elif round_info:
                     # Assign matchday based on round
-                    round_name = match_data.get("round", "").lower()
-                    if "round of 16" in round_name or "last 16" in round_name:
-                        matchday = 7
-                    elif "quarter" in round_name:
-                        matchday = 8
-                    elif "semi" in round_name:
-                        matchday = 9
-                    elif "final" in round_name:
-                        matchday = 10
+                    matchday = round_info[0]
                 
-                self.db.execute("""
-                    INSERT INTO matches (
-                        id, home_team_id, away_team_id, home_score, away_score,
-                        matchday, date, status, stage, round, group_name, competition_id
-                    )
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    ON CONFLICT (id) DO UPDATE SET
-                        home_score = excluded.home_score,
-                        away_score = excluded.away_score,
-                        status = excluded.status,
-                        stage = excluded.stage,
-                        round = excluded.round,
-                        group_name = excluded.group_name,
-                        competition_id = excluded.competition_id
-                """, (
+                rows.append((
                     match_id,
                     home_team_id,
                     away_team_id,
-                    match_data.get("home_score"),
-                    match_data.get("away_score"),
+                    get("home_score"),
+                    get("away_score"),
                     matchday,
                     match_date,
-                    match_data.get("status", "FINISHED"),
-                    match_data.get("stage"),
-                    match_data.get("round"),
-                    match_data.get("group_name"),
+                    get("status", "FINISHED"),
+                    get("stage"),
+                    round_name,
+                    get("group_name"),
                     comp_id
                 ))
-                matches_inserted += 1
                 
-            except Exception as e:
+            except duckdb.Error as e:
                 logger.debug(f"Error storing match: {e}")
                 matches_skipped += 1
         
-        self.db.commit()
-        logger.info(f"Synced {matches_inserted} matches and {teams_inserted} teams for {comp_name} season {season_str} from GitHub (skipped {matches_skipped})")
+        changed = self._changed_match_rows(rows)
+        matches_inserted = self._bulk_upsert_matches(changed)
+        matches_skipped += len(changed) - matches_inserted
+        logger.info(f"Synced {matches_inserted} matches and {teams_inserted} teams for {comp_name} season {season_str} from GitHub ({len(rows) - len(changed)} unchanged, skipped {matches_skipped})")
     
-    def sync_all(self, competition_id: str = "CL"):
+    def sync_all(self, competition_id: str = "CL", full_refresh: bool = False):
         """Sync all data (teams, matches, standings).
         
+        Standings and matches are fetched once, concurrently, and shared by
+        the individual sync steps. All steps are written in one transaction,
+        so a failed sync leaves the previous data untouched. If the database
+        rejects some rows, the steps are rerun in their own transactions so
+        only those rows are skipped. If both responses are unchanged since
+        the previous sync and no matches went missing, nothing is written.
+        
         Args:
             competition_id: Competition ID
+            full_refresh: Drop the secondary indexes on matches while writing
+                them and rebuild them afterwards; faster for an initial load,
+                slower for routine incremental syncs
         """
-        self.sync_teams(competition_id)
-        self.sync_matches(competition_id)
-        # Also try to fetch knockout stage matches if available
-        self.sync_knockout_matches(competition_id)
-        self.sync_standings(competition_id)
-    
-    def sync_knockout_matches(self, competition_id: str = "CL"):
-        """Sync knockout stage matches from API.
+        standings_data, matches_data = self.api_client.get_standings_and_matches(competition_id)
         
-        Tries to fetch matches for different knockout stages to get future draw information.
+        # Cached responses and ones revalidated with a 304 (see
+        # APIClient.get_many_async) come back identical, as do unchanged 200s;
+        # skip the writes if nothing changed since the last sync in this process
+        fingerprint = hash(orjson.dumps([standings_data, matches_data]))
+        if not full_refresh and self._synced.get(competition_id) == (fingerprint, self._match_count(competition_id)):
+            logger.info(f"{competition_id} data unchanged since the last sync, skipping")
+            self._touch_standings(standings_data)
+            return
+        
+        # Drop the indexes outside the transaction: rebuilding them inside an
+        # aborted one would fail and hide the row error from the retry below
+        with self.db.without_indexes("matches") if full_refresh else nullcontext():
+            try:
+                with self.db.transaction():
+                    self._write_all(competition_id, standings_data, matches_data)
+            except _ROW_ERRORS as e:
+                logger.warning(f"{competition_id} sync rejected some rows, retrying step by step: {e}")
+                self._write_all(competition_id, standings_data, matches_data)
+        self._synced[competition_id] = (fingerprint, self._match_count(competition_id))
+    
+    def _write_all(self, competition_id: str, standings_data: Dict[str, Any],
+                   matches_data: Dict[str, Any]):
+        """Run the sync steps of sync_all() on already fetched data.
         
         Args:
             competition_id: Competition ID
+            standings_data: Standings response
+            matches_data: Matches response
         """
-        # Try different stage filters to get knockout matches
-        stages_to_try = [
-            "KNOCKOUT_OUT",
-            "KNOCKOUT_ROUND", 
-            None  # Get all matches which may include future knockout matches
+        self.sync_teams(competition_id, standings_data, matches_data)
+        stored_ids = self.sync_matches(competition_id, matches_data)
+        # Also pick out knockout stage matches (future draws) from the same payload
+        self.sync_knockout_matches(competition_id, matches_data, skip_ids=stored_ids)
+        self.sync_standings(competition_id, standings_data)
+    
+    def _touch_standings(self, standings_data: Dict[str, Any]):
+        """Mark the stored standings as current without rewriting them.
+        
+        Args:
+            standings_data: Standings response confirmed to be unchanged
+        """
+        now = datetime.utcnow().isoformat()
+        team_ids = [
+            row[0] for row in (_standing_to_row(entry, now) for entry in _standing_entries(standings_data)) if row
         ]
+        if team_ids:
+            placeholders = ", ".join("?" * len(team_ids))
+            self.db.execute(
+                f"UPDATE standings SET last_updated = ? WHERE team_id IN ({placeholders})",
+                (now, *team_ids)
+            )
+    
+    def _match_count(self, competition_id: str) -> int:
+        """Count stored matches for a competition.
         
-        for stage in stages_to_try:
+        Args:
+            competition_id: Competition ID
+            
+        Returns:
+            Number of matches
+        """
+        return self.db.fetchone(
+            "SELECT COUNT(*) FROM matches WHERE competition_id = ?", (competition_id,)
+        )[0]
+    
+    def sync_knockout_matches(self, competition_id: str = "CL",
+                              matches_data: Optional[Dict[str, Any]] = None,
+                              skip_ids: Optional[Set[int]] = None):
+        """Sync knockout stage matches from API.
+        
+        Knockout matches (including future draws) are picked out of the full
+        match list when it is given; otherwise they are requested with a
+        single stage-filtered call.
+        
+        Args:
+            competition_id: Competition ID
+            matches_data: Pre-fetched matches response covering all stages
+            skip_ids: IDs of matches from matches_data that are already stored
+        """
+        if matches_data is None:
             try:
-                if stage:
-                    matches_data = self.api_client.get_competition_matches_by_stage(competition_id, stage)
-                else:
-                    matches_data = self.api_client.get_competition_matches(competition_id)
-                
-                if "matches" not in matches_data:
-                    continue
-                
-                matches_inserted = 0
-                for match in matches_data["matches"]:
-                    match_id = match.get("id")
-                    home_team = match.get("homeTeam", {})
-                    away_team = match.get("awayTeam", {})
-                    
-                    home_team_id = home_team.get("id")
-                    away_team_id = away_team.get("id")
-                    
-                    if not match_id or not home_team_id or not away_team_id:
-                        continue
-                    
-                    # Only process knockout stage matches
-                    match_stage = match.get("stage")
-                    if match_stage == "LEAGUE_STAGE":
-                        continue
-                    
-                    try:
-                        score = match.get("score", {})
-                        full_time = score.get("fullTime", {})
-                        
-                        round_info = match.get("round")
-                        if isinstance(round_info, dict):
-                            round_name = round_info.get("name") or round_info.get("round")
-                        else:
-                            round_name = round_info
-                        
-                        group_info = match.get("group")
-                        if isinstance(group_info, dict):
-                            group_name = group_info.get("name") or group_info.get("group")
-                        else:
-                            group_name = group_info
-                        
-                        self.db.execute("""
-                            INSERT INTO matches (
-                                id, home_team_id, away_team_id, home_score, away_score,
-                                matchday, date, status, stage, round, group_name
-                            )
-                            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                            ON CONFLICT (id) DO UPDATE SET
-                                home_score = excluded.home_score,
-                                away_score = excluded.away_score,
-                                status = excluded.status,
-                                stage = excluded.stage,
-                                round = excluded.round,
-                                group_name = excluded.group_name,
-                                matchday = excluded.matchday,
-                                date = excluded.date
-                        """, (
-                            match_id,
-                            home_team_id,
-                            away_team_id,
-                            full_time.get("home"),
-                            full_time.get("away"),
-                            match.get("matchday"),
-                            match.get("utcDate"),
-                            match.get("status"),
-                            match_stage,
-                            round_name,
-                            group_name
-                        ))
-                        matches_inserted += 1
-                    except Exception as e:
-                        logger.debug(f"Skipping knockout match {match_id}: {e}")
-                        continue
-                
-                if matches_inserted > 0:
-                    self.db.commit()
-                    logger.info(f"Synced {matches_inserted} knockout matches from stage {stage or 'all'}")
-                    break  # If we got matches, no need to try other stages
+                matches_data = self.api_client.get_competition_matches_by_stage(competition_id, "KNOCKOUT_ROUND")
             except Exception as e:
-                logger.debug(f"Could not fetch matches for stage {stage}: {e}")
-                continue
-
+                logger.debug(f"Could not fetch matches for stage KNOCKOUT_ROUND: {e}")
+                return
+        
+        if "matches" not in matches_data:
+            return
+        
+        # Only process knockout stage matches not already stored; filter before
+        # building rows since league matches make up most of the payload
+        skip_ids = skip_ids or set()
+        rows = [
+            row for row in (_match_to_row(match, competition_id)
+                            for match in matches_data["matches"]
+                            if match.get("stage") != "LEAGUE_STAGE" and match.get("id") not in skip_ids)
+            if row
+        ]
+        
+        matches_inserted = self._bulk_upsert_matches(rows)
+        if matches_inserted > 0:
+            logger.info(f"Synced {matches_inserted} knockout matches")
@@ -1,15 +1,121 @@
 """DuckDB database connection and schema management."""
 import os
 import logging
+import threading
+import weakref
 import duckdb
-from typing import Optional
+from contextlib import contextmanager
+from typing import List, Optional
 from pathlib import Path
 
 logger = logging.getLogger(__name__)
 
+# Shared with APICache; responses are stored as serialized JSON bytes and
+# timestamps as epoch seconds so expiry checks are plain integer comparisons
+API_CACHE_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS api_cache (
+        cache_key TEXT PRIMARY KEY,
+        endpoint TEXT NOT NULL,
+        response_data BLOB NOT NULL,
+        cached_at BIGINT NOT NULL,
+        expires_at BIGINT NOT NULL,
+        etag TEXT,
+        last_modified TEXT
+    )
+"""
+
+# All tables and indexes, created in one statement batch when the database
+# is opened
+SCHEMA_SQL = f"""
+    -- Teams table
+    CREATE TABLE IF NOT EXISTS teams (
+        id INTEGER PRIMARY KEY,
+        name TEXT NOT NULL,
+        code TEXT,
+        crest TEXT
+    );
+    
+    -- Matches table
+    CREATE TABLE IF NOT EXISTS matches (
+        id INTEGER PRIMARY KEY,
+        home_team_id INTEGER NOT NULL,
+        away_team_id INTEGER NOT NULL,
+        home_score INTEGER,
+        away_score INTEGER,
+        matchday INTEGER,
+        date TEXT,
+        status TEXT,
+        stage TEXT,
+        round TEXT,
+        group_name TEXT,
+        competition_id TEXT,
+        FOREIGN KEY (home_team_id) REFERENCES teams(id),
+        FOREIGN KEY (away_team_id) REFERENCES teams(id)
+    );
+    
+    -- Per-competition date range scans (season counts, current season filters)
+    CREATE INDEX IF NOT EXISTS idx_matches_competition_date ON matches(competition_id, date);
+    -- Per-team lookups (team details, Elo and play-off history)
+    CREATE INDEX IF NOT EXISTS idx_matches_home_team ON matches(home_team_id);
+    CREATE INDEX IF NOT EXISTS idx_matches_away_team ON matches(away_team_id);
+    
+    -- Standings table
+    CREATE TABLE IF NOT EXISTS standings (
+        team_id INTEGER PRIMARY KEY,
+        position INTEGER,
+        played INTEGER,
+        won INTEGER,
+        drawn INTEGER,
+        lost INTEGER,
+        goals_for INTEGER,
+        goals_against INTEGER,
+        goal_difference INTEGER,
+        points INTEGER,
+        last_updated TEXT,
+        FOREIGN KEY (team_id) REFERENCES teams(id)
+    );
+    
+    -- Solkoff coefficients table
+    CREATE TABLE IF NOT EXISTS solkoff_coefficients (
+        team_id INTEGER PRIMARY KEY,
+        solkoff_value REAL NOT NULL,
+        calculated_at TEXT NOT NULL,
+        FOREIGN KEY (team_id) REFERENCES teams(id)
+    );
+    
+    -- Elo ratings table
+    CREATE TABLE IF NOT EXISTS elo_ratings (
+        team_id INTEGER PRIMARY KEY,
+        rating REAL NOT NULL,
+        matches_played INTEGER NOT NULL,
+        updated_at TEXT NOT NULL
+    );
+    
+    -- API cache table
+    {API_CACHE_TABLE_SQL};
+    CREATE INDEX IF NOT EXISTS idx_api_cache_expires ON api_cache(expires_at);
+"""
+
+# Bump when _initialize_schema gains a migration; databases already at this
+# version skip the migration checks when opened
+SCHEMA_VERSION = 1
+
+
+class _ThreadToken:
+    """Marker kept in a thread's locals; freed, and finalized, when the thread ends."""
+
 
 class Database:
-    """Manages DuckDB connection and schema."""
+    """Manages DuckDB connection and schema.
+    
+    One instance may be shared between threads (the app's scheduler,
+    background sync and request handlers all use the same one). DuckDB
+    connections must not be used from several threads at once, so each
+    thread runs its statements on a connection of its own, opened from the
+    first one on demand and closed when the thread ends. Transactions are
+    per thread: a transaction() block only ever contains the statements of
+    the thread that opened it.
+    """
     
     def __init__(self, db_path: str = "./data/ucl.db"):
         """Initialize database connection.
@@ -21,78 +127,83 @@ class Database:
         Path(db_path).parent.mkdir(parents=True, exist_ok=True)
         
         self.db_path = db_path
-        self.conn: Optional[duckdb.DuckDBPyConnection] = None
+        self._conn: Optional[duckdb.DuckDBPyConnection] = None
+        # Per-thread connection and transaction() nesting depth
+        self._local = threading.local()
+        # Finalizers closing the connections opened for other threads, run
+        # when the thread ends or, at the latest, with the database
+        self._thread_conns: List[weakref.finalize] = []
+        self._thread_conns_lock = threading.Lock()
         self._connect()
         self._initialize_schema()
     
     def _connect(self):
         """Establish database connection."""
-        self.conn = duckdb.connect(self.db_path)
+        self._conn = duckdb.connect(self.db_path)
+        self._local.conn = self._conn
+    
+    @property
+    def conn(self) -> Optional[duckdb.DuckDBPyConnection]:
+        """The calling thread's connection, or None once the database is closed."""
+        if self._conn is None:
+            return None
+        return self._thread_conn(self._local, self._conn.cursor)
+    
+    def _thread_conn(self, local: threading.local, open_conn) -> duckdb.DuckDBPyConnection:
+        """Get the calling thread's connection stored in ``local``, opening it on first use.
+        
+        Args:
+            local: Thread-local namespace holding the connection as ``conn``
+            open_conn: Callable opening a new connection
+            
+        Returns:
+            Connection owned by the calling thread
+        """
+        conn = getattr(local, "conn", None)
+        if conn is None:
+            conn = local.conn = open_conn()
+            # Thread-local values are released when their thread ends, so
+            # worker threads (e.g. a sync's pool) don't leave connections behind
+            local.token = _ThreadToken()
+            finalizer = weakref.finalize(local.token, conn.close)
+            with self._thread_conns_lock:
+                self._thread_conns = [f for f in self._thread_conns if f.alive]
+                self._thread_conns.append(finalizer)
+        return conn
+    
+    @property
+    def _transaction_depth(self) -> int:
+        """Nesting depth of the calling thread's transaction() blocks."""
+        return getattr(self._local, "transaction_depth", 0)
+    
+    @_transaction_depth.setter
+    def _transaction_depth(self, depth: int):
+        self._local.transaction_depth = depth
     
     def _initialize_schema(self):
         """Create database tables if they don't exist."""
-        # Teams table
-        self.conn.execute("""
-            CREATE TABLE IF NOT EXISTS teams (
-                id INTEGER PRIMARY KEY,
-                name TEXT NOT NULL,
-                code TEXT,
-                crest TEXT
-            )
-        """)
+        self.conn.execute("CREATE TABLE IF NOT EXISTS schema_version (version INTEGER NOT NULL)")
         
-        # Matches table
-        self.conn.execute("""
-            CREATE TABLE IF NOT EXISTS matches (
-                id INTEGER PRIMARY KEY,
-                home_team_id INTEGER NOT NULL,
-                away_team_id INTEGER NOT NULL,
-                home_score INTEGER,
-                away_score INTEGER,
-                matchday INTEGER,
-                date TEXT,
-                status TEXT,
-                stage TEXT,
-                round TEXT,
-                group_name TEXT,
-                competition_id TEXT,
-                FOREIGN KEY (home_team_id) REFERENCES teams(id),
-                FOREIGN KEY (away_team_id) REFERENCES teams(id)
-            )
-        """)
+        # Migrations only run for databases written by an older version. They
+        # run before SCHEMA_SQL: tables cannot be altered once indexed, and
+        # on a new database there is nothing to migrate yet
+        stored_version = self.conn.execute("SELECT MAX(version) FROM schema_version").fetchone()[0]
+        needs_migration = (stored_version or 0) < SCHEMA_VERSION
+        if needs_migration:
+            self._migrate_matches_table()
+            self._migrate_solkoff_table()
+            self._migrate_api_cache_table()
         
-        # Migration: Add new columns to existing matches table if they don't exist
-        self._migrate_matches_table()
+        self.conn.execute(SCHEMA_SQL)
         
-        # Standings table
-        self.conn.execute("""
-            CREATE TABLE IF NOT EXISTS standings (
-                team_id INTEGER PRIMARY KEY,
-                position INTEGER,
-                played INTEGER,
-                won INTEGER,
-                drawn INTEGER,
-                lost INTEGER,
-                goals_for INTEGER,
-                goals_against INTEGER,
-                goal_difference INTEGER,
-                points INTEGER,
-                last_updated TEXT,
-                FOREIGN KEY (team_id) REFERENCES teams(id)
-            )
-        """)
+        if needs_migration:
+            self.conn.execute("DELETE FROM schema_version")
+            self.conn.execute("INSERT INTO schema_version VALUES (?)", [SCHEMA_VERSION])
         
-        # Solkoff coefficients table
-        self.conn.execute("""
-            CREATE TABLE IF NOT EXISTS solkoff_coefficients (
-                team_id INTEGER PRIMARY KEY,
-                solkoff_value REAL NOT NULL,
-                calculated_at TEXT NOT NULL,
-                FOREIGN KEY (team_id) REFERENCES teams(id)
-            )
-        """)
-        
-        # Migration: Update existing INTEGER column to REAL if needed
+        self.conn.commit()
+    
+    def _migrate_solkoff_table(self):
+        """Convert an INTEGER solkoff_value column to REAL."""
         try:
             # Check if table exists by trying to describe it
             columns_info = self.conn.execute("DESCRIBE solkoff_coefficients").fetchall()
@@ -100,95 +211,61 @@ class Database:
             if col_info:
                 col_type = str(col_info[1]).upper()
                 if 'INTEGER' in col_type:
-                    # DuckDB doesn't support ALTER COLUMN, so we need to recreate the table
                     logger.info("Migrating solkoff_coefficients table: converting INTEGER to REAL")
-                    # Create new table with REAL type
-                    self.conn.execute("""
-                        CREATE TABLE IF NOT EXISTS solkoff_coefficients_new (
-                            team_id INTEGER PRIMARY KEY,
-                            solkoff_value REAL NOT NULL,
-                            calculated_at TEXT NOT NULL,
-                            FOREIGN KEY (team_id) REFERENCES teams(id)
-                        )
-                    """)
-                    # Copy data, converting INTEGER to REAL (though values will need recalculation)
-                    self.conn.execute("""
-                        INSERT INTO solkoff_coefficients_new (team_id, solkoff_value, calculated_at)
-                        SELECT team_id, CAST(solkoff_value AS REAL), calculated_at
-                        FROM solkoff_coefficients
-                    """)
-                    # Drop old table
-                    self.conn.execute("DROP TABLE solkoff_coefficients")
-                    # Rename new table
-                    self.conn.execute("ALTER TABLE solkoff_coefficients_new RENAME TO solkoff_coefficients")
+                    try:
+                        # Rewrites the column in place
+                        self.conn.execute("ALTER TABLE solkoff_coefficients ALTER solkoff_value TYPE REAL")
+                    except duckdb.Error as e:
+                        logger.debug(f"Could not alter solkoff_value in place, recreating the table: {e}")
+                        self._recreate_solkoff_table()
                     self.conn.commit()
                     logger.info("Migration completed: solkoff_value is now REAL. Note: Values should be recalculated.")
         except Exception as e:
             # Table might not exist yet, which is fine
             logger.debug(f"Could not migrate solkoff_coefficients schema (this is OK if table doesn't exist): {e}")
+    
+    def _recreate_solkoff_table(self):
+        """Copy solkoff_coefficients into a new table with a REAL solkoff_value."""
+        with self.transaction():
+            # Create new table with REAL type
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS solkoff_coefficients_new (
+                    team_id INTEGER PRIMARY KEY,
+                    solkoff_value REAL NOT NULL,
+                    calculated_at TEXT NOT NULL,
+                    FOREIGN KEY (team_id) REFERENCES teams(id)
+                )
+            """)
+            # Copy data, converting INTEGER to REAL (though values will need recalculation)
+            self.conn.execute("""
+                INSERT INTO solkoff_coefficients_new (team_id, solkoff_value, calculated_at)
+                SELECT team_id, CAST(solkoff_value AS REAL), calculated_at
+                FROM solkoff_coefficients
+            """)
+            # Drop old table
+            self.conn.execute("DROP TABLE solkoff_coefficients")
+            # Rename new table
+            self.conn.execute("ALTER TABLE solkoff_coefficients_new RENAME TO solkoff_coefficients")
+    
+    def _migrate_api_cache_table(self):
+        """Drop an api_cache table with an outdated layout.
         
-        # Elo ratings table
-        self.conn.execute("""
-            CREATE TABLE IF NOT EXISTS elo_ratings (
-                team_id INTEGER PRIMARY KEY,
-                rating REAL NOT NULL,
-                matches_played INTEGER NOT NULL,
-                updated_at TEXT NOT NULL
-            )
-        """)
-
-        # API cache table
-        self.conn.execute("""
-            CREATE TABLE IF NOT EXISTS api_cache (
-                cache_key TEXT PRIMARY KEY,
-                endpoint TEXT NOT NULL,
-                response_data TEXT NOT NULL,
-                cached_at TEXT NOT NULL,
-                expires_at TEXT NOT NULL
-            )
-        """)
-        
-        # Migration: Add missing columns to existing api_cache table if needed
+        Cached responses are disposable, so a table from an older layout
+        (TEXT payloads, ISO text timestamps) is dropped and recreated.
+        """
         try:
             columns_info = self.conn.execute("DESCRIBE api_cache").fetchall()
-            existing_columns = {col[0] for col in columns_info}
-            
-            # Add endpoint column if missing
-            if 'endpoint' not in existing_columns:
-                try:
-                    self.conn.execute("ALTER TABLE api_cache ADD COLUMN endpoint TEXT")
-                    # Set default value for existing rows
-                    self.conn.execute("UPDATE api_cache SET endpoint = '' WHERE endpoint IS NULL")
-                    logger.info("Added 'endpoint' column to api_cache table")
-                except Exception as e:
-                    logger.debug(f"Could not add 'endpoint' column: {e}")
-            
-            # Migrate created_at to cached_at if needed
-            if 'created_at' in existing_columns and 'cached_at' not in existing_columns:
-                try:
-                    self.conn.execute("ALTER TABLE api_cache ADD COLUMN cached_at TEXT")
-                    # Copy data from created_at to cached_at
-                    self.conn.execute("UPDATE api_cache SET cached_at = created_at WHERE cached_at IS NULL")
-                    # Drop old column
-                    self.conn.execute("ALTER TABLE api_cache DROP COLUMN created_at")
-                    logger.info("Migrated 'created_at' to 'cached_at' in api_cache table")
-                except Exception as e:
-                    logger.debug(f"Could not migrate created_at to cached_at: {e}")
-            elif 'cached_at' not in existing_columns:
-                # If neither exists, add cached_at
-                try:
-                    self.conn.execute("ALTER TABLE api_cache ADD COLUMN cached_at TEXT")
-                    # Set default for existing rows
-                    self.conn.execute("UPDATE api_cache SET cached_at = CURRENT_TIMESTAMP::TEXT WHERE cached_at IS NULL")
-                    logger.info("Added 'cached_at' column to api_cache table")
-                except Exception as e:
-                    logger.debug(f"Could not add 'cached_at' column: {e}")
-                    
+            column_types = {col[0]: str(col[1]).upper() for col in columns_info}
+            expected_types = {
+                'response_data': 'BLOB', 'expires_at': 'BIGINT',
+                'etag': 'VARCHAR', 'last_modified': 'VARCHAR'
+            }
+            if any(column_types.get(col) != col_type for col, col_type in expected_types.items()):
+                self.conn.execute("DROP TABLE api_cache")
+                logger.info("Recreating api_cache table with the current layout")
         except Exception as e:
             # Table might not exist yet, which is fine
             logger.debug(f"Could not check api_cache table columns (table may not exist yet): {e}")
-        
-        self.conn.commit()
     
     def _migrate_matches_table(self):
         """Add new columns to existing matches table if they don't exist."""
@@ -271,15 +348,131 @@ class Database:
         """
         return self.execute(query, parameters).fetchone()
     
+    def cursor(self) -> duckdb.DuckDBPyConnection:
+        """Open a cursor on the same database for use from another thread.
+        
+        DuckDB connections must not be shared between threads; each cursor is
+        an independent connection to the same database instance and sees all
+        committed data.
+        
+        Returns:
+            New DuckDB connection
+        """
+        return self.conn.cursor()
+    
+    def thread_cursor(self, local: threading.local) -> duckdb.DuckDBPyConnection:
+        """Get the calling thread's cursor kept in ``local``, opening it on first use.
+        
+        Unlike cursor(), the cursor is closed for the caller once its thread
+        ends (or when the database is closed).
+        
+        Args:
+            local: Caller's thread-local namespace; the cursor is stored in it
+                as ``conn``
+            
+        Returns:
+            DuckDB connection owned by the calling thread
+        """
+        return self._thread_conn(local, self.cursor)
+    
+    @contextmanager
+    def bulk_load(self):
+        """Tune the database for a large write burst such as a backfill.
+        
+        Defers WAL checkpoints (normally every 16 MiB of WAL) and drops
+        insertion-order bookkeeping for the duration of the block, then
+        restores the defaults and checkpoints once. Both settings are global,
+        so they apply to every connection (and thread) while the block runs.
+        The final checkpoint is skipped with a warning if another thread has
+        a write transaction open; automatic checkpointing catches up later.
+        DuckDB has no equivalent of disabling fsync or constraint checks, so
+        only these are relaxed.
+        """
+        self.conn.execute("SET wal_autocheckpoint = '1GB'")
+        self.conn.execute("SET preserve_insertion_order = false")
+        try:
+            yield self
+        finally:
+            self.conn.execute("RESET wal_autocheckpoint")
+            self.conn.execute("RESET preserve_insertion_order")
+            try:
+                self.conn.execute("CHECKPOINT")
+            except duckdb.Error as e:
+                logger.warning(f"Checkpoint after bulk load failed, leaving it to autocheckpoint: {e}")
+    
+    @contextmanager
+    def without_indexes(self, table: str):
+        """Drop a table's secondary indexes for the duration of the block.
+        
+        Rebuilding an index once after a bulk load is cheaper than updating it
+        on every insert. Primary key and unique constraints are kept. The
+        indexes are recreated from their original definitions on exit.
+        
+        Args:
+            table: Table whose non-unique indexes are dropped
+        """
+        indexes = self.conn.execute("""
+            SELECT index_name, sql FROM duckdb_indexes()
+            WHERE table_name = ? AND NOT is_unique AND NOT is_primary
+        """, [table]).fetchall()
+        for index_name, _ in indexes:
+            self.conn.execute(f'DROP INDEX "{index_name}"')
+        try:
+            yield self
+        finally:
+            for _, create_sql in indexes:
+                self.conn.execute(create_sql)
+    
+    @contextmanager
+    def transaction(self):
+        """Run the block in a single transaction.
+        
+        Commits on exit, or rolls back if the block raises. DuckDB has no
+        SAVEPOINTs, so a nested block joins the enclosing transaction and
+        leaves committing or rolling back to it. Only blocks on the same
+        thread nest; other threads run on their own connections.
+        """
+        if self._transaction_depth:
+            self._transaction_depth += 1
+            try:
+                yield self
+            finally:
+                self._transaction_depth -= 1
+            return
+        
+        self.execute("BEGIN TRANSACTION")
+        self._transaction_depth = 1
+        try:
+            yield self
+        except BaseException:
+            self.execute("ROLLBACK")
+            raise
+        else:
+            self.commit()
+        finally:
+            self._transaction_depth = 0
+    
+    def in_transaction(self) -> bool:
+        """Check whether the calling thread runs inside a transaction() block.
+        
+        Returns:
+            True if this thread has a transaction() block open
+        """
+        return self._transaction_depth > 0
+    
     def commit(self):
         """Commit current transaction."""
         self.conn.commit()
     
     def close(self):
         """Close database connection."""
-        if self.conn:
-            self.conn.close()
-            self.conn = None
+        if self._conn:
+            with self._thread_conns_lock:
+                for finalizer in self._thread_conns:
+                    finalizer()
+                self._thread_conns.clear()
+            self._conn.close()
+            self._conn = None
     
     def __enter__(self):
         """Context manager entry."""
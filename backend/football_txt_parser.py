@@ -2,11 +2,14 @@
 import re
 import logging
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional, Tuple
-from collections import defaultdict
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Sequence, Tuple
+from collections import defaultdict, deque
 
 logger = logging.getLogger(__name__)
 
+# How many preceding lines are searched for a match's date
+DATE_LOOKBACK_LINES = 10
+
 
 class FootballTxtParser:
     """Parses structured football.txt format from openfootball repository."""
@@ -37,22 +40,55 @@ class FootballTxtParser:
         if not content:
             return {"teams": [], "matches": [], "competition": competition, "season": season}
         
+        teams = []
+        matches = []
+        for kind, value in self.iter_parse(content.split('\n'), competition, season):
+            if kind == "match":
+                matches.append(value)
+            else:
+                teams.append(value)
+        
+        # Convert team names to list of dictionaries
+        teams_list = [{"name": name, "code": None, "crest": None} for name in sorted(teams)]
+        
+        return {
+            "teams": teams_list,
+            "matches": matches,
+            "competition": self.current_competition,
+            "season": season
+        }
+    
+    def iter_parse(self, lines: Iterable[str], competition: str = "CL",
+                   season: str = None) -> Iterator[Tuple[str, Any]]:
+        """Parse football.txt lines one at a time.
+        
+        Only the last few lines are kept (for date lookback), so a file
+        object can be passed directly without reading it into memory.
+        
+        Args:
+            lines: Lines of football.txt content, e.g. an open file
+            competition: Competition code (CL, EL, UCL)
+            season: Season identifier (e.g., "2023-24")
+            
+        Yields:
+            ("team", name) the first time a team is seen and
+            ("match", match dictionary) for each parsed match
+        """
         self.current_competition = competition
         self.current_season = season
         self.current_stage = None
         self.current_round = None
         self.current_group = None
         
-        lines = content.split('\n')
         teams = set()
-        matches = []
+        # Previous lines, for dates written above the matches they apply to
+        context = deque(maxlen=DATE_LOOKBACK_LINES)
         
-        i = 0
-        while i < len(lines):
-            line = lines[i].strip()
+        for raw_line in lines:
+            line = raw_line.strip()
             
             if not line or line.startswith('#'):
-                i += 1
+                context.append(raw_line)
                 continue
             
             # Parse competition header
@@ -70,9 +106,10 @@ class FootballTxtParser:
                 if group_match:
                     self.current_group = f"Group {group_match.group(1).upper()}"
                 # Extract teams from group line
-                team_names = self._extract_teams_from_group_line(line)
-                for team_name in team_names:
-                    teams.add(team_name)
+                for team_name in self._extract_teams_from_group_line(line):
+                    if team_name not in teams:
+                        teams.add(team_name)
+                        yield "team", team_name
             
             # Parse knockout stage headers
             elif any(keyword in line for keyword in ['Round of 16', 'Quarter-finals', 'Quarter-final', 'Semi-finals', 'Semi-final', 'Final']):
@@ -83,26 +120,16 @@ class FootballTxtParser:
             
             # Parse match lines
             elif self._is_match_line(line):
-                match_data = self._parse_match_line(line, i, lines)
+                match_data = self._parse_match_line(line, len(context), context)
                 if match_data:
-                    matches.append(match_data)
                     # Extract teams from match
-                    if match_data.get('home_team'):
-                        teams.add(match_data['home_team'])
-                    if match_data.get('away_team'):
-                        teams.add(match_data['away_team'])
+                    for team_name in (match_data.get('home_team'), match_data.get('away_team')):
+                        if team_name and team_name not in teams:
+                            teams.add(team_name)
+                            yield "team", team_name
+                    yield "match", match_data
             
-            i += 1
-        
-        # Convert teams set to list of dictionaries
-        teams_list = [{"name": name, "code": None, "crest": None} for name in sorted(teams)]
-        
-        return {
-            "teams": teams_list,
-            "matches": matches,
-            "competition": self.current_competition,
-            "season": season
-        }
+            context.append(raw_line)
     
     def _normalize_competition(self, comp_name: str) -> str:
         """Normalize competition name to code.
@@ -198,7 +225,7 @@ class FootballTxtParser:
         
         return True
     
-    def _parse_match_line(self, line: str, line_num: int, all_lines: List[str]) -> Optional[Dict[str, Any]]:
+    def _parse_match_line(self, line: str, line_num: int, all_lines: Sequence[str]) -> Optional[Dict[str, Any]]:
         """Parse a single match line.
         
         Args:
@@ -325,7 +352,8 @@ class FootballTxtParser:
             logger.debug(f"Error parsing match line '{line}': {e}")
             return None
     
-    def _extract_date_from_context(self, line_num: int, all_lines: List[str], lookback: int = 10) -> Optional[str]:
+    def _extract_date_from_context(self, line_num: int, all_lines: Sequence[str],
+                                   lookback: int = DATE_LOOKBACK_LINES) -> Optional[str]:
         """Extract date from previous lines.
         
         Args:
@@ -336,8 +364,6 @@ class FootballTxtParser:
         Returns:
             Date string in YYYY-MM-DD format or None
         """
-        import calendar
-        
         # Determine season year from self.current_season
         season_year = None
         if self.current_season:
@@ -2,7 +2,7 @@
 import logging
 import tempfile
 import shutil
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, TextIO
 from pathlib import Path
 from git import Repo
 
@@ -23,10 +23,16 @@ class GitHubDataFetcher:
         self.cache_dir = Path(cache_dir) if cache_dir else None
         self.cloned_repo_path: Optional[Path] = None
         self._temp_dir: Optional[Path] = None
+        self._sparse = False
     
-    def clone_repository(self) -> Path:
+    def clone_repository(self, paths: Optional[List[str]] = None) -> Path:
         """Clone the repository to a temporary location.
         
+        Args:
+            paths: Season directories to check out (e.g. ["2023-24"]). If given,
+                only their files are downloaded (partial, sparse clone);
+                otherwise the whole tree is checked out
+        
         Returns:
             Path to the cloned repository
             
@@ -35,6 +41,13 @@ class GitHubDataFetcher:
         """
         if self.cloned_repo_path and self.cloned_repo_path.exists():
             logger.debug("Repository already cloned, reusing existing clone")
+            if self._sparse:
+                # A sparse clone only has the directories requested so far
+                if paths:
+                    Repo(self.cloned_repo_path).git.sparse_checkout("add", *paths)
+                else:
+                    Repo(self.cloned_repo_path).git.sparse_checkout("disable")
+                    self._sparse = False
             return self.cloned_repo_path
         
         try:
@@ -45,12 +58,18 @@ class GitHubDataFetcher:
             logger.info(f"Cloning repository to {self.cloned_repo_path}")
             
             # Clone repository using GitPython (shallow clone for speed)
-            Repo.clone_from(
+            repo = Repo.clone_from(
                 self.REPO_URL,
                 str(self.cloned_repo_path),
                 depth=1,  # Shallow clone for speed
+                # Without paths, download every file; with them, fetch file
+                # contents on checkout and check out only the top level
+                multi_options=["--filter=blob:none", "--sparse"] if paths else None,
                 progress=None  # Disable progress output
             )
+            if paths:
+                repo.git.sparse_checkout("set", *paths)
+                self._sparse = True
             
             logger.info("Repository cloned successfully")
             return self.cloned_repo_path
@@ -70,6 +89,7 @@ class GitHubDataFetcher:
                 shutil.rmtree(self._temp_dir)
                 self._temp_dir = None
                 self.cloned_repo_path = None
+                self._sparse = False
                 logger.debug("Temporary directory removed")
             except Exception as e:
                 logger.warning(f"Error cleaning up temporary directory: {e}")
@@ -122,6 +142,44 @@ class GitHubDataFetcher:
         Returns:
             File content as string, or None if not found
         """
+        file_path = self._find_season_file(season, competition)
+        if not file_path:
+            return None
+        try:
+            return file_path.read_text(encoding='utf-8')
+        except Exception as e:
+            logger.debug(f"Error reading {file_path}: {e}")
+            return None
+    
+    def open_season_file(self, season: str, competition: str = "CL") -> Optional[TextIO]:
+        """Open a season file from the cloned repository for line-by-line reading.
+        
+        Args:
+            season: Season identifier (e.g., "2023-24")
+            competition: Competition type (CL, EL, UCL)
+            
+        Returns:
+            Text-mode file object (the caller closes it), or None if not found
+        """
+        file_path = self._find_season_file(season, competition)
+        if not file_path:
+            return None
+        try:
+            return file_path.open(encoding='utf-8')
+        except Exception as e:
+            logger.debug(f"Error opening {file_path}: {e}")
+            return None
+    
+    def _find_season_file(self, season: str, competition: str) -> Optional[Path]:
+        """Locate the file holding a competition's season in the cloned repository.
+        
+        Args:
+            season: Season identifier (e.g., "2023-24")
+            competition: Competition type (CL, EL, UCL)
+            
+        Returns:
+            Path to the season file, or None if not found
+        """
         if not self.cloned_repo_path:
             logger.warning("Repository not cloned. Call clone_repository() first.")
             return None
@@ -163,14 +221,8 @@ class GitHubDataFetcher:
         # Try files that actually exist in the directory
         for file_name in file_names_to_try:
             if file_name in available_files:
-                file_path = season_path / file_name
-                try:
-                    content = file_path.read_text(encoding='utf-8')
-                    logger.info(f"Read {season} {competition} from cloned repo ({file_name})")
-                    return content
-                except Exception as e:
-                    logger.debug(f"Error reading {file_path}: {e}")
-                    continue
+                logger.info(f"Read {season} {competition} from cloned repo ({file_name})")
+                return season_path / file_name
         
         # If no specific file found, try any .txt file in the directory
         # (some seasons might have a single file with all competitions)
@@ -189,7 +241,7 @@ class GitHubDataFetcher:
                     keywords = comp_keywords.get(competition, [])
                     if any(keyword in content_lower for keyword in keywords):
                         logger.info(f"Read {season} {competition} from cloned repo ({file_name})")
-                        return content
+                        return file_path
                 except Exception as e:
                     logger.debug(f"Error reading {file_path}: {e}")
                     continue
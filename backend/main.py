@@ -277,11 +277,12 @@ async def refresh_historical_data(years_back: int = 10, delay: float = 3.0):
         # Initialize API client with cache
         cache_ttl = int(os.getenv("API_CACHE_TTL", "3600"))
         api_cache = APICache(db, default_ttl_seconds=cache_ttl)
-        api_client = APIClient(cache=api_cache, use_cache=True)
-        data_service = DataService(db, api_client)
-        
-        logger.info(f"Starting historical data sync for {years_back} years with {delay}s delay between requests")
-        data_service.sync_historical_matches(years_back=years_back, delay_between_requests=delay)
+        # Closed afterwards so each call releases its connections
+        with APIClient(cache=api_cache, use_cache=True) as api_client:
+            data_service = DataService(db, api_client)
+            
+            logger.info(f"Starting historical data sync for {years_back} years with {delay}s delay between requests")
+            data_service.sync_historical_matches(years_back=years_back, delay_between_requests=delay)
         
         return {
             "message": f"Historical data sync completed for {years_back} years",
@@ -303,7 +304,8 @@ async def clear_cache():
         raise HTTPException(status_code=503, detail="Database not initialized")
     
     try:
-        cache = APICache(db)
+        # Use the scheduler's cache so its in-process layer is dropped as well
+        cache = scheduler.api_cache if scheduler else APICache(db)
         cache.clear()
         return {"message": "Cache cleared successfully"}
     except Exception as e:
@@ -518,10 +520,8 @@ async def get_playoff_pairs() -> List[Dict[str, Any]]:
     
     try:
         from backend.api_client import APIClient
-        api_client = APIClient()
-        analyzer = PlayoffAnalyzer(db, api_client)
-        
-        pairs = analyzer.get_playoff_pairs()
+        with APIClient() as api_client:
+            pairs = PlayoffAnalyzer(db, api_client).get_playoff_pairs()
         logger.info(f"Found {len(pairs)} play-off pairs")
         return pairs
     except Exception as e:
@@ -542,10 +542,8 @@ async def get_current_stage() -> Dict[str, Any]:
     
     try:
         from backend.api_client import APIClient
-        api_client = APIClient()
-        analyzer = PlayoffAnalyzer(db, api_client)
-        
-        current_stage = analyzer.get_current_stage()
+        with APIClient() as api_client:
+            current_stage = PlayoffAnalyzer(db, api_client).get_current_stage()
         logger.info(f"Current tournament stage: {current_stage}")
         return {"stage": current_stage}
     except Exception as e:
@@ -625,11 +623,9 @@ async def get_knockout_pairs_by_stage(stage: str) -> List[Dict[str, Any]]:
         from backend.api_client import APIClient
         from backend.uefa_draws_scraper import UEFADrawsScraper
         
-        api_client = APIClient()
-        analyzer = PlayoffAnalyzer(db, api_client)
-        
         # First try to get pairs from database (actual matches)
-        pairs = analyzer.get_pairs_by_stage(stage.upper())
+        with APIClient() as api_client:
+            pairs = PlayoffAnalyzer(db, api_client).get_pairs_by_stage(stage.upper())
         
         # If no pairs found, try to get draw information from UEFA
         if len(pairs) == 0:
@@ -668,10 +664,8 @@ async def get_playoff_analysis(team1_id: int, team2_id: int) -> Dict[str, Any]:
     
     try:
         from backend.api_client import APIClient
-        api_client = APIClient()
-        analyzer = PlayoffAnalyzer(db, api_client)
-        
-        analysis = analyzer.analyze_pair(team1_id, team2_id)
+        with APIClient() as api_client:
+            analysis = PlayoffAnalyzer(db, api_client).analyze_pair(team1_id, team2_id)
         return analysis
     except Exception as e:
         logger.error(f"Error analyzing play-off pair: {e}", exc_info=True)
@@ -1,7 +1,7 @@
 """Analyzer for play-off pair matchups based on historical common opponents."""
 import os
 import logging
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from typing import Dict, List, Any, Set, Tuple, Optional
 from collections import defaultdict
 from backend.database import Database
@@ -44,7 +44,6 @@ class PlayoffAnalyzer:
             date = datetime.fromisoformat(date_str_clean)
             
             # Get current time - normalize both to UTC for comparison
-            from datetime import timezone, timedelta
             now_utc = datetime.now(timezone.utc)
             
             # Convert date to UTC if it has timezone info
@@ -394,11 +393,9 @@ class PlayoffAnalyzer:
         conditions = ["m.status IN ('SCHEDULED', 'TIMED', 'LIVE', 'IN_PLAY', 'PAUSED', 'FINISHED')"]
         # Only get current season matches (competition_id = 'CL' for current season)
         # Filter by date to get only current season (August of current year onwards, or previous August if we're before August)
-        from datetime import datetime
-        current_year = datetime.now().year
-        current_month = datetime.now().month
+        now = datetime.now()
         # Season starts in August, so if we're before August, the season started in previous year
-        season_start_year = current_year if current_month >= 8 else current_year - 1
+        season_start_year = now.year if now.month >= 8 else now.year - 1
         season_start_date = f"{season_start_year}-08-01"
         conditions.append(f"m.competition_id = '{competition_id}'")
         conditions.append(f"m.date >= '{season_start_date}'")
@@ -54,6 +54,9 @@ class DataScheduler:
         try:
             logger.info("Starting data update...")
             
+            # Reap expired cache entries in one batch before fetching
+            self.api_cache.cleanup_expired()
+            
             # Sync all data from API
             self.data_service.sync_all(self.competition_id)
             logger.info("Data synced successfully")
@@ -106,6 +109,7 @@ class DataScheduler:
     def stop(self):
         """Stop the scheduler."""
         self.scheduler.shutdown()
+        self.api_client.close()
         logger.info("Scheduler stopped")
     
     def trigger_update(self):
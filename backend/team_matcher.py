@@ -5,6 +5,29 @@ from difflib import SequenceMatcher
 
 logger = logging.getLogger(__name__)
 
+_MAPPING_SELECT_SQL = """
+    SELECT team_id, confidence
+    FROM team_mappings
+    WHERE team_name = ?
+"""
+
+_MAPPING_UPSERT_SQL = """
+    INSERT INTO team_mappings (team_name, team_id, confidence, source)
+    VALUES (?, ?, ?, ?)
+    ON CONFLICT (team_name) DO UPDATE SET
+        team_id = excluded.team_id,
+        confidence = excluded.confidence
+"""
+
+_MAPPING_INSERT_SQL = """
+    INSERT INTO team_mappings (team_name, team_id, confidence, source)
+    VALUES (?, ?, ?, ?)
+"""
+
+_TEAM_NAMES_SQL = "SELECT id, name FROM teams"
+
+_TEAM_INSERT_SQL = "INSERT INTO teams (id, name, code, crest) VALUES (?, ?, ?, ?)"
+
 
 class TeamMatcher:
     """Matches team names from GitHub data to football-data.org team IDs."""
@@ -47,20 +70,13 @@ class TeamMatcher:
         normalized_name = self._normalize_team_name(team_name)
         
         # Check if we have a mapping
-        mapping = self.db.fetchone("""
-            SELECT team_id, confidence
-            FROM team_mappings
-            WHERE team_name = ?
-        """, (normalized_name,))
+        mapping = self.db.fetchone(_MAPPING_SELECT_SQL, (normalized_name,))
         
         if mapping and mapping[0]:
             return mapping[0]
         
         # Try to find in existing teams table by name matching
-        existing_teams = self.db.fetchall("""
-            SELECT id, name
-            FROM teams
-        """)
+        existing_teams = self.db.fetchall(_TEAM_NAMES_SQL)
         
         best_match = None
         best_score = 0.0
@@ -74,13 +90,7 @@ class TeamMatcher:
         if best_match:
             team_id, matched_name = best_match
             # Store mapping for future use
-            self.db.execute("""
-                INSERT INTO team_mappings (team_name, team_id, confidence, source)
-                VALUES (?, ?, ?, ?)
-                ON CONFLICT (team_name) DO UPDATE SET
-                    team_id = excluded.team_id,
-                    confidence = excluded.confidence
-            """, (normalized_name, team_id, best_score, "fuzzy_match"))
+            self.db.execute(_MAPPING_UPSERT_SQL, (normalized_name, team_id, best_score, "fuzzy_match"))
             self.db.commit()
             logger.debug(f"Matched '{team_name}' to existing team ID {team_id} ({matched_name}) with {best_score:.2f} confidence")
             return team_id
@@ -95,17 +105,11 @@ class TeamMatcher:
         new_team_id = -(abs(min_id) + 1000 + len(existing_teams))
         
         try:
-            self.db.execute("""
-                INSERT INTO teams (id, name, code, crest)
-                VALUES (?, ?, ?, ?)
-            """, (new_team_id, team_name, None, None))
+            self.db.execute(_TEAM_INSERT_SQL, (new_team_id, team_name, None, None))
             self.db.commit()
             
             # Store mapping
-            self.db.execute("""
-                INSERT INTO team_mappings (team_name, team_id, confidence, source)
-                VALUES (?, ?, ?, ?)
-            """, (normalized_name, new_team_id, 1.0, "synthetic"))
+            self.db.execute(_MAPPING_INSERT_SQL, (normalized_name, new_team_id, 1.0, "synthetic"))
             self.db.commit()
             
             logger.debug(f"Created new team ID {new_team_id} for '{team_name}'")
@@ -115,6 +119,29 @@ class TeamMatcher:
             logger.warning(f"Error creating team for '{team_name}': {e}")
             return None
     
+    def find_or_create_team_id_cached(self, team_name: str, competition_id: str,
+                                      cache: Dict[str, Optional[int]]) -> Optional[int]:
+        """Find or create a team ID, memoized in a caller-owned cache.
+        
+        Meant for bulk imports where the same names repeat on every match;
+        each distinct name goes to the database once per cache.
+        
+        Args:
+            team_name: Team name from GitHub data
+            competition_id: Competition code
+            cache: Mapping of team name to resolved ID, updated in place
+            
+        Returns:
+            Team ID (existing or newly created)
+        """
+        if team_name in cache:
+            return cache[team_name]
+        team_id = self.find_or_create_team_id(team_name, competition_id)
+        # Failed lookups are not cached so a later call can retry them
+        if team_id:
+            cache[team_name] = team_id
+        return team_id
+    
     def _normalize_team_name(self, name: str) -> str:
         """Normalize team name for matching.
         
@@ -0,0 +1,203 @@
+"""Tests for API cache module."""
+import pytest
+import tempfile
+import os
+import orjson
+from concurrent.futures import ThreadPoolExecutor
+from backend.database import Database
+from backend.api_cache import APICache
+
+
+@pytest.fixture
+def temp_db():
+    """Create a temporary database for testing."""
+    fd, db_path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+
+    # Remove the file if it exists (DuckDB will create it)
+    if os.path.exists(db_path):
+        os.unlink(db_path)
+
+    db = Database(db_path=db_path)
+    yield db
+
+    db.close()
+    # Clean up database files
+    if os.path.exists(db_path):
+        os.unlink(db_path)
+    if os.path.exists(db_path + '.wal'):
+        os.unlink(db_path + '.wal')
+
+
+@pytest.fixture
+def cache(temp_db):
+    """Create API cache instance."""
+    return APICache(temp_db)
+
+
+def test_set_and_get(cache):
+    """Test cached responses are returned until cleared."""
+    cache.set("competitions/CL/standings", {"standings": []})
+
+    assert cache.get("competitions/CL/standings") == {"standings": []}
+    assert cache.get("competitions/CL/matches") is None
+
+
+def test_get_reads_database_when_not_in_memory(temp_db, cache):
+    """Test a fresh cache instance falls back to the database."""
+    cache.set("teams/1", {"id": 1})
+
+    other = APICache(temp_db)
+    assert other.get("teams/1") == {"id": 1}
+
+
+def test_memory_layer_is_bounded(temp_db):
+    """Test the in-process layer evicts least recently used entries."""
+    cache = APICache(temp_db, memory_size=2)
+    cache.set("a", {"a": 1})
+    cache.set("b", {"b": 1})
+    cache.get("a")
+    cache.set("c", {"c": 1})
+
+    assert list(cache._mem) == ["a", "c"]
+    # Evicted entries are still served from the database
+    assert cache.get("b") == {"b": 1}
+
+
+def test_clear(cache):
+    """Test clearing a single endpoint and the whole cache."""
+    cache.set("a", {"a": 1})
+    cache.set("b", {"b": 1})
+
+    cache.clear("a")
+    assert cache.get("a") is None
+    assert cache.get("b") == {"b": 1}
+
+    cache.clear()
+    assert cache.get("b") is None
+
+
+def test_batch_commits_once(cache):
+    """Test writes inside batch() are visible after the block."""
+    with cache.batch():
+        cache.set("a", {"a": 1})
+        cache.set("b", {"b": 1})
+
+    assert cache.get("a") == {"a": 1}
+    assert cache.get("b") == {"b": 1}
+
+
+def test_batch_rolls_back_on_error(cache):
+    """Test a failing batch discards all of its writes."""
+    with pytest.raises(RuntimeError):
+        with cache.batch():
+            cache.set("a", {"a": 1})
+            raise RuntimeError("boom")
+
+    assert cache.get("a") is None
+
+
+def test_nested_batch_joins_outer_batch(cache):
+    """Test a nested batch is committed or rolled back with the enclosing one."""
+    with pytest.raises(RuntimeError):
+        with cache.batch():
+            with cache.batch():
+                cache.set("a", {"a": 1})
+            raise RuntimeError("boom")
+
+    assert cache.get("a") is None
+
+
+def test_writes_stay_out_of_database_transactions(temp_db, cache):
+    """Test cache writes are not rolled back with a transaction open on the database."""
+    with pytest.raises(RuntimeError):
+        with temp_db.transaction():
+            temp_db.execute("INSERT INTO teams (id, name) VALUES (1, 'A')")
+            with cache.batch():
+                cache.set("a", {"a": 1})
+            raise RuntimeError("boom")
+
+    assert temp_db.fetchone("SELECT COUNT(*) FROM teams")[0] == 0
+    assert APICache(temp_db).get("a") == {"a": 1}
+
+
+def test_lookup_reports_empty_payload_as_hit(cache):
+    """Test an empty cached response is distinguished from a miss."""
+    cache.set("competitions/CL/matches", {})
+
+    assert cache.lookup("competitions/CL/matches") == (True, {})
+    assert cache.lookup("competitions/EL/matches") == (False, None)
+
+
+def test_cleanup_expired_deletes_in_batches(cache):
+    """Test expired rows are removed across several chunked deletes."""
+    for i in range(5):
+        cache.set(f"teams/{i}", {"id": i}, ttl_seconds=-10)
+    cache.set("teams/live", {"id": 99})
+
+    assert cache.cleanup_expired(batch_size=2) == 5
+    assert cache.get("teams/live") == {"id": 99}
+    assert cache.db.fetchone("SELECT COUNT(*) FROM api_cache")[0] == 1
+
+
+def test_expired_entry_with_validators_can_be_refreshed(cache):
+    """Test expired entries keep their validators and can be revived."""
+    cache.set("competitions/CL/standings", {"standings": []}, ttl_seconds=-10, etag='"v1"')
+    cache.set("competitions/CL/matches", {"matches": []}, ttl_seconds=-10)
+
+    assert cache.get("competitions/CL/standings") is None
+    assert cache.get_validators("competitions/CL/standings") == ('"v1"', None)
+    assert cache.get_validators("competitions/CL/matches") is None
+
+    # Only the entry that cannot be revalidated is reaped
+    assert cache.cleanup_expired() == 1
+
+    assert cache.refresh("competitions/CL/standings") == {"standings": []}
+    assert cache.get("competitions/CL/standings") == {"standings": []}
+
+
+def test_concurrent_reads_from_threads(temp_db):
+    """Test the cache can be read from several threads at once."""
+    writer = APICache(temp_db)
+    for i in range(20):
+        writer.set(f"teams/{i}", {"id": i})
+
+    # A fresh instance has an empty memory layer, so every lookup hits the database
+    reader = APICache(temp_db)
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        results = list(pool.map(reader.get, [f"teams/{i}" for i in range(20)]))
+
+    assert results == [{"id": i} for i in range(20)]
+
+
+def test_large_payloads_are_compressed(temp_db, cache):
+    """Test large responses are stored compressed and read back intact."""
+    data = {"matches": [{"id": i, "status": "FINISHED"} for i in range(200)]}
+    cache.set("competitions/CL/matches", data)
+
+    stored = temp_db.fetchone("SELECT response_data FROM api_cache")[0]
+    assert len(stored) < len(orjson.dumps(data)) // 3
+    assert APICache(temp_db).get("competitions/CL/matches") == data
+
+
+def test_get_many(temp_db, cache):
+    """Test several entries are looked up at once, skipping misses and expired rows."""
+    cache.set("teams/1", {"id": 1})
+    cache.set("teams/2", {})
+    cache.set("teams/3", {"id": 3}, ttl_seconds=-10)
+
+    # Fresh instance so the lookups go to the database
+    result = APICache(temp_db).get_many(["teams/1", "teams/2", "teams/3", "teams/4"])
+
+    assert result == {"teams/1": {"id": 1}, "teams/2": {}}
+
+
+def test_worker_writes_survive_rollback_on_other_thread(temp_db, cache):
+    """Test a write from a worker thread is not part of another thread's transaction."""
+    with pytest.raises(RuntimeError):
+        with temp_db.transaction():
+            with ThreadPoolExecutor(max_workers=1) as pool:
+                pool.submit(cache.set, "competitions/CL/matches?season=2020", {"matches": []}).result()
+            raise RuntimeError("boom")
+
+    assert APICache(temp_db).get("competitions/CL/matches?season=2020") == {"matches": []}
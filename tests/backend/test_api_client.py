@@ -1,7 +1,11 @@
 """Tests for API client module."""
 import pytest
-from unittest.mock import patch, Mock
+import httpx
+import orjson
+from contextlib import nullcontext
+from unittest.mock import patch, Mock, AsyncMock
 from backend.api_client import APIClient
+from backend.api_cache import APICache
 
 
 @pytest.fixture
@@ -33,45 +37,47 @@ def test_api_client_defaults():
 def test_get_competition_standings(mock_client_class, api_client):
     """Test getting competition standings."""
     mock_response = Mock()
-    mock_response.json.return_value = {
+    mock_response.content = orjson.dumps({
         "competition": {"id": 2001, "name": "Champions League"},
         "standings": []
-    }
+    })
     mock_response.raise_for_status = Mock()
-    
+
     mock_client = Mock()
     mock_client.__enter__ = Mock(return_value=mock_client)
     mock_client.__exit__ = Mock(return_value=None)
     mock_client.get.return_value = mock_response
     mock_client_class.return_value = mock_client
-    
+
     result = api_client.get_competition_standings("CL")
-    
+
     assert "competition" in result
     assert "standings" in result
     mock_client.get.assert_called_once()
     call_args = mock_client.get.call_args
     assert "competitions/CL/standings" in call_args[0][0]
+    # Auth header is installed on the client, not sent per call
+    assert mock_client_class.call_args[1]["headers"] == {"X-Auth-Token": "test_key"}
 
 
 @patch('httpx.Client')
 def test_get_competition_matches(mock_client_class, api_client):
     """Test getting competition matches."""
     mock_response = Mock()
-    mock_response.json.return_value = {
+    mock_response.content = orjson.dumps({
         "matches": [],
         "resultSet": {"count": 0}
-    }
+    })
     mock_response.raise_for_status = Mock()
-    
+
     mock_client = Mock()
     mock_client.__enter__ = Mock(return_value=mock_client)
     mock_client.__exit__ = Mock(return_value=None)
     mock_client.get.return_value = mock_response
     mock_client_class.return_value = mock_client
-    
+
     result = api_client.get_competition_matches("CL")
-    
+
     assert "matches" in result
     mock_client.get.assert_called_once()
     call_args = mock_client.get.call_args
@@ -82,21 +88,21 @@ def test_get_competition_matches(mock_client_class, api_client):
 def test_get_team(mock_client_class, api_client):
     """Test getting team information."""
     mock_response = Mock()
-    mock_response.json.return_value = {
+    mock_response.content = orjson.dumps({
         "id": 1,
         "name": "Test Team",
         "code": "TT"
-    }
+    })
     mock_response.raise_for_status = Mock()
-    
+
     mock_client = Mock()
     mock_client.__enter__ = Mock(return_value=mock_client)
     mock_client.__exit__ = Mock(return_value=None)
     mock_client.get.return_value = mock_response
     mock_client_class.return_value = mock_client
-    
+
     result = api_client.get_team(1)
-    
+
     assert result["id"] == 1
     assert result["name"] == "Test Team"
     mock_client.get.assert_called_once()
@@ -108,18 +114,201 @@ def test_get_team(mock_client_class, api_client):
 def test_api_error_handling(mock_client_class, api_client):
     """Test API error handling."""
     import httpx
-    
+
     mock_response = Mock()
     mock_response.raise_for_status.side_effect = httpx.HTTPStatusError(
         "Not Found", request=Mock(), response=Mock(status_code=404)
     )
-    
+
     mock_client = Mock()
     mock_client.__enter__ = Mock(return_value=mock_client)
     mock_client.__exit__ = Mock(return_value=None)
     mock_client.get.return_value = mock_response
     mock_client_class.return_value = mock_client
-    
+
     with pytest.raises(httpx.HTTPStatusError):
         api_client.get_competition_standings("CL")
 
+
+@patch('httpx.AsyncClient')
+def test_get_many(mock_client_class, api_client):
+    """Test fetching several endpoints concurrently."""
+    def make_response(url, **kwargs):
+        response = Mock(status_code=200)
+        response.content = orjson.dumps({"url": url})
+        response.raise_for_status = Mock()
+        return response
+
+    mock_client = Mock()
+    mock_client.get = AsyncMock(side_effect=make_response)
+    mock_client.aclose = AsyncMock()
+    mock_client_class.return_value = mock_client
+
+    result = api_client.get_many(["competitions/CL/standings", "competitions/CL/matches"])
+    api_client.get_many(["teams/1"])
+    api_client.close()
+
+    assert set(result) == {"competitions/CL/standings", "competitions/CL/matches"}
+    assert result["competitions/CL/matches"]["url"].endswith("competitions/CL/matches")
+    assert mock_client.get.call_count == 3
+    # One async client serves every call until the API client is closed
+    mock_client_class.assert_called_once()
+    mock_client.aclose.assert_awaited_once()
+
+
+@patch('httpx.AsyncClient')
+def test_get_many_revalidates_expired_entries(mock_client_class):
+    """Test concurrent requests revalidate expired entries and cache validators."""
+    cache = Mock(spec=APICache)
+    cache.get_many.return_value = {}
+    cache.get_validators.side_effect = lambda endpoint: ('"v1"', None) if "standings" in endpoint else None
+    cache.refresh.return_value = {"standings": []}
+    cache.batch.return_value = nullcontext()
+    client = APIClient(api_key="test_key", base_url="https://api.test.com/v4", cache=cache)
+
+    def make_response(url, headers):
+        if "standings" in url:
+            assert headers == {"If-None-Match": '"v1"'}
+            return Mock(status_code=304)
+        assert headers == {}
+        return Mock(status_code=200, content=orjson.dumps({"matches": []}), headers={"ETag": '"m1"'})
+
+    mock_client = Mock()
+    mock_client.get = AsyncMock(side_effect=make_response)
+    mock_client.aclose = AsyncMock()
+    mock_client_class.return_value = mock_client
+
+    standings, matches = client.get_standings_and_matches("CL")
+    client.close()
+
+    assert standings == {"standings": []}
+    assert matches == {"matches": []}
+    cache.refresh.assert_called_once_with("competitions/CL/standings", None)
+    cache.set.assert_called_once_with(
+        "competitions/CL/matches", {"matches": []}, None, etag='"m1"', last_modified=None
+    )
+
+
+def test_rate_limit_allows_burst_then_spaces_requests(api_client):
+    """Test the token bucket only delays requests once the burst is spent."""
+    api_client.min_request_interval = 1.0
+    api_client.rate_limit_burst = 2
+    api_client._tokens = 2
+
+    assert api_client._reserve_request_slot() == 0
+    assert api_client._reserve_request_slot() == 0
+    assert api_client._reserve_request_slot() == pytest.approx(1.0, abs=0.05)
+    assert api_client._reserve_request_slot() == pytest.approx(2.0, abs=0.05)
+
+
+def test_retry_delay_honours_retry_after(api_client):
+    """Test 429 retries wait for Retry-After and otherwise back off with jitter."""
+    response = Mock(headers={"Retry-After": "7"})
+    assert api_client._retry_delay(0, response) == 7.0
+
+    response = Mock(headers={})
+    assert 2.0 <= api_client._retry_delay(1, response) <= 2.3
+
+
+@patch('httpx.Client')
+def test_expired_entry_is_revalidated(mock_client_class):
+    """Test an expired cache entry is refetched conditionally and reused on 304."""
+    cache = Mock(spec=APICache)
+    cache.lookup.return_value = (False, None)
+    cache.get_validators.return_value = ('"v1"', "Mon, 01 Sep 2025 10:00:00 GMT")
+    cache.refresh.return_value = {"standings": []}
+    client = APIClient(api_key="test_key", base_url="https://api.test.com/v4", cache=cache)
+
+    mock_client = Mock()
+    mock_client.get.return_value = Mock(status_code=304)
+    mock_client_class.return_value = mock_client
+
+    result = client.get_competition_standings("CL")
+
+    assert result == {"standings": []}
+    headers = mock_client.get.call_args[1]["headers"]
+    assert headers["If-None-Match"] == '"v1"'
+    assert headers["If-Modified-Since"] == "Mon, 01 Sep 2025 10:00:00 GMT"
+    cache.refresh.assert_called_once()
+    cache.set.assert_not_called()
+
+
+@patch('time.sleep')
+@patch('httpx.Client')
+def test_304_without_cached_copy_refetches_on_last_attempt(mock_client_class, _sleep):
+    """Test a 304 for a vanished cache entry is refetched without spending a retry."""
+    cache = Mock(spec=APICache)
+    cache.lookup.return_value = (False, None)
+    cache.get_validators.return_value = ('"v1"', None)
+    cache.refresh.return_value = None
+    client = APIClient(api_key="test_key", base_url="https://api.test.com/v4", cache=cache)
+
+    mock_client = Mock()
+    mock_client.get.side_effect = [
+        Mock(status_code=429, headers={}),
+        Mock(status_code=429, headers={}),
+        Mock(status_code=304),
+        Mock(status_code=200, content=orjson.dumps({"standings": []}), headers={}),
+    ]
+    mock_client_class.return_value = mock_client
+
+    assert client.get_competition_standings("CL") == {"standings": []}
+    assert mock_client.get.call_args_list[-1][1]["headers"] == {}
+    cache.set.assert_called_once()
+
+
+def test_cache_ttl_by_endpoint(api_client):
+    """Test static endpoints get a long TTL and live ones the cache default."""
+    assert api_client._cache_ttl_for("teams/86") == 24 * 3600
+    assert api_client._cache_ttl_for("competitions/CL/matches") is None
+
+
+def test_endpoints_are_canonical(api_client):
+    """Test equivalent endpoints map to the same path and cache key."""
+    assert api_client._build_endpoint("/competitions/CL/matches", stage="LEAGUE_STAGE", season=2024) == \
+        "competitions/CL/matches?season=2024&stage=LEAGUE_STAGE"
+    assert api_client._build_endpoint("competitions/CL/matches", season=None) == "competitions/CL/matches"
+    assert api_client._canonical_endpoint("/competitions/CL/matches?stage=LEAGUE_STAGE&season=2024") == \
+        api_client._canonical_endpoint("competitions/CL/matches?season=2024&stage=LEAGUE_STAGE")
+    # Repeated keys and blank values still tell queries apart
+    assert api_client._canonical_endpoint("matches?status=B&status=A") == "matches?status=A&status=B"
+    assert api_client._canonical_endpoint("matches?status=A&status=B") != \
+        api_client._canonical_endpoint("matches?status=B")
+    assert api_client._canonical_endpoint("matches?stage=") == "matches?stage="
+
+
+def test_get_teams_only_fetches_cache_misses():
+    """Test cached teams are served from the cache and only misses are requested."""
+    cache = Mock(spec=APICache)
+    cache.get_many.return_value = {"teams/1": {"id": 1}, "teams/2": {"id": 2}}
+    client = APIClient(api_key="test_key", base_url="https://api.test.com/v4", cache=cache)
+
+    assert client.get_teams([1, 2]) == {1: {"id": 1}, 2: {"id": 2}}
+    cache.get_many.assert_called_once_with(["teams/1", "teams/2"])
+
+
+@patch('httpx.Client')
+def test_warmup_ignores_connection_errors(mock_client_class, api_client):
+    """Test warmup opens a connection, takes a rate-limit token and never raises."""
+    mock_client = Mock()
+    mock_client.head.side_effect = httpx.ConnectError("unreachable")
+    mock_client_class.return_value = mock_client
+    tokens = api_client._tokens
+
+    api_client.warmup()
+
+    mock_client.head.assert_called_once_with("https://api.test.com/v4")
+    assert api_client._tokens == pytest.approx(tokens - 1, abs=0.05)
+
+
+def test_get_standings_and_matches(api_client):
+    """Test standings and matches are requested together."""
+    with patch.object(api_client, "get_many", return_value={
+        "competitions/CL/standings": {"standings": []},
+        "competitions/CL/matches": {"matches": []}
+    }) as get_many:
+        standings, matches = api_client.get_standings_and_matches("CL")
+
+    get_many.assert_called_once_with(["competitions/CL/standings", "competitions/CL/matches"])
+    assert standings == {"standings": []}
+    assert matches == {"matches": []}
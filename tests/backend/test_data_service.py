@@ -1,7 +1,11 @@
 """Tests for data service module."""
+import io
 import pytest
-from unittest.mock import Mock, patch
-from backend.data_service import DataService
+import duckdb
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from unittest.mock import MagicMock, Mock, patch
+from backend.data_service import DataService, _match_to_row, _standing_to_row, _synthetic_match_id, _team_to_row
 from backend.database import Database
 from backend.api_client import APIClient
 
@@ -12,9 +16,18 @@ def mock_db():
     db = Mock(spec=Database)
     db.execute = Mock()
     db.commit = Mock()
+    db.fetchone.return_value = (0,)
+    # Transaction semantics are covered by tests on a real Database
+    db.transaction.side_effect = lambda: nullcontext()
+    db.in_transaction.return_value = False
     return db
 
 
+def _inserts(mock_db, table):
+    """Get the (query, params) of each INSERT INTO table executed on the mock."""
+    return [c[0] for c in mock_db.execute.call_args_list if f"INSERT INTO {table}" in c[0][0]]
+
+
 @pytest.fixture
 def mock_api_client():
     """Create mock API client."""
@@ -51,12 +64,13 @@ def test_sync_teams_from_standings(data_service, mock_db, mock_api_client):
         }]
     }
     mock_api_client.get_competition_matches.return_value = {"matches": []}
-    
+
     data_service.sync_teams("CL")
-    
-    # Should execute INSERT for each team
-    assert mock_db.execute.call_count >= 2
-    mock_db.commit.assert_called_once()
+
+    # Should upsert all teams in one multi-row statement
+    inserts = _inserts(mock_db, "teams")
+    assert len(inserts) == 1
+    assert len(inserts[0][1]) == 2 * 4
 
 
 def test_sync_teams_from_matches(data_service, mock_db, mock_api_client):
@@ -70,12 +84,29 @@ def test_sync_teams_from_matches(data_service, mock_db, mock_api_client):
             }
         ]
     }
-    
+
     data_service.sync_teams("CL")
-    
-    # Should execute INSERT for teams from matches
-    assert mock_db.execute.call_count >= 2
-    mock_db.commit.assert_called_once()
+
+    # Should upsert teams from matches in one multi-row statement
+    inserts = _inserts(mock_db, "teams")
+    assert len(inserts) == 1
+    assert len(inserts[0][1]) == 2 * 4
+
+
+def test_sync_teams_prefers_standings_fields(data_service, mock_db):
+    """Test a team seen in standings and matches is merged into one row."""
+    standings_data = {"standings": [{"table": [
+        {"team": {"id": 1, "name": "Team A", "tla": "TMA", "crest": None}}
+    ]}]}
+    matches_data = {"matches": [{
+        "homeTeam": {"id": 1, "name": "Team A FC", "shortName": "Team A", "crest": "url1"},
+        "awayTeam": {"id": 2, "name": "Away", "shortName": "AWY", "crest": "url2"}
+    }]}
+
+    data_service.sync_teams("CL", standings_data, matches_data)
+
+    (_, params), = _inserts(mock_db, "teams")
+    assert params == (1, "Team A", "TMA", "url1", 2, "Away", "AWY", "url2")
 
 
 def test_sync_matches(data_service, mock_db, mock_api_client):
@@ -93,16 +124,14 @@ def test_sync_matches(data_service, mock_db, mock_api_client):
             }
         ]
     }
-    
+
     data_service.sync_matches("CL")
-    
-    mock_db.execute.assert_called_once()
-    mock_db.commit.assert_called_once()
-    
-    # Check that correct parameters were passed
-    call_args = mock_db.execute.call_args
-    assert "INSERT INTO matches" in call_args[0][0]
-    assert len(call_args[0][1]) == 11  # 11 parameters (id, home_team_id, away_team_id, home_score, away_score, matchday, date, status, stage, round, group_name)
+
+    # Matches are written in one multi-row INSERT
+    inserts = _inserts(mock_db, "matches")
+    assert len(inserts) == 1
+    assert len(inserts[0][1]) == 12  # 12 parameters (id, home_team_id, away_team_id, home_score, away_score, matchday, date, status, stage, round, group_name, competition_id)
+    assert inserts[0][1][-1] == "CL"
 
 
 def test_sync_standings(data_service, mock_db, mock_api_client):
@@ -125,29 +154,267 @@ def test_sync_standings(data_service, mock_db, mock_api_client):
             ]
         }]
     }
-    
+
     data_service.sync_standings("CL")
-    
-    mock_db.execute.assert_called_once()
-    mock_db.commit.assert_called_once()
-    
+
+    # All standings are written with a single batched statement
+    mock_db.transaction.assert_called_once()
+
     # Check that correct parameters were passed
-    call_args = mock_db.execute.call_args
-    assert "INSERT INTO standings" in call_args[0][0]
-    assert len(call_args[0][1]) == 11  # 11 parameters
+    (_, params), = _inserts(mock_db, "standings")
+    assert len(params) == 11  # 11 parameters
 
 
 def test_sync_all(data_service, mock_db, mock_api_client):
     """Test syncing all data."""
-    mock_api_client.get_competition_standings.return_value = {
-        "standings": [{"table": []}]
-    }
-    mock_api_client.get_competition_matches.return_value = {"matches": []}
-    
+    mock_api_client.get_standings_and_matches.return_value = (
+        {"standings": [{"table": []}]},
+        {"matches": []}
+    )
+
+    data_service.sync_all("CL")
+
+    # Standings and matches are fetched once and shared by the sync steps
+    mock_api_client.get_standings_and_matches.assert_called_once_with("CL")
+    mock_api_client.get_competition_standings.assert_not_called()
+    # Nothing to write, so no batches are opened
+    assert not _inserts(mock_db, "teams")
+    assert not _inserts(mock_db, "matches")
+
+
+def test_sync_all_skips_unchanged_data(data_service, mock_db, mock_api_client):
+    """Test a repeated sync with identical responses writes nothing."""
+    mock_api_client.get_standings_and_matches.return_value = (
+        {"standings": [{"table": [{"team": {"id": 1, "name": "Team A"}}]}]},
+        {"matches": []}
+    )
+    mock_db.without_indexes = MagicMock()
+
+    data_service.sync_all("CL")
+    assert len(_inserts(mock_db, "teams")) == 1
+
+    data_service.sync_all("CL")
+    assert len(_inserts(mock_db, "teams")) == 1
+    # The standings are still marked as current
+    query, params = mock_db.execute.call_args[0]
+    assert query.startswith("UPDATE standings SET last_updated")
+    assert params[1:] == (1,)
+
+    data_service.sync_all("CL", full_refresh=True)
+    assert len(_inserts(mock_db, "teams")) == 2
+
+
+def test_sync_all_full_refresh_drops_match_indexes(data_service, mock_db, mock_api_client):
+    """Test a full refresh writes matches without their secondary indexes."""
+    mock_api_client.get_standings_and_matches.return_value = ({"standings": []}, {"matches": []})
+    mock_db.without_indexes = MagicMock()
+
+    data_service.sync_all("CL")
+    mock_db.without_indexes.assert_not_called()
+
+    data_service.sync_all("CL", full_refresh=True)
+    mock_db.without_indexes.assert_called_once_with("matches")
+
+
+def test_sync_all_is_atomic(tmp_path, mock_api_client):
+    """Test a failing sync step discards the writes of the earlier steps."""
+    db = Database(db_path=str(tmp_path / "atomic.db"))
+    service = DataService(db, mock_api_client)
+    mock_api_client.get_standings_and_matches.return_value = ({"standings": []}, {
+        "matches": [{"id": 1, "homeTeam": {"id": 1, "name": "A"}, "awayTeam": {"id": 2, "name": "B"}}]
+    })
+
+    with patch.object(service, "sync_standings", side_effect=RuntimeError("boom")):
+        with pytest.raises(RuntimeError):
+            service.sync_all("CL", full_refresh=True)
+    assert db.fetchone("SELECT COUNT(*) FROM teams")[0] == 0
+
+    service.sync_all("CL", full_refresh=True)
+    assert db.fetchall("SELECT id FROM matches") == [(1,)]
+
+    # A rejected row (team without a name) only skips that row and its matches
+    mock_api_client.get_standings_and_matches.return_value = ({"standings": []}, {
+        "matches": [
+            {"id": 1, "homeTeam": {"id": 1, "name": "A"}, "awayTeam": {"id": 2, "name": "B"}, "status": "FINISHED"},
+            {"id": 2, "homeTeam": {"id": 1, "name": "A"}, "awayTeam": {"id": 3}}
+        ]
+    })
+    service.sync_all("CL")
+    assert db.fetchall("SELECT id, status FROM matches") == [(1, "FINISHED")]
+
+    # Same on a full refresh, where the indexes are rebuilt after the retry
+    mock_api_client.get_standings_and_matches.return_value = ({"standings": []}, {
+        "matches": [
+            {"id": 1, "homeTeam": {"id": 1, "name": "A"}, "awayTeam": {"id": 2, "name": "B"}, "status": "FINISHED"},
+            {"id": 3, "homeTeam": {"id": 1, "name": "A"}, "awayTeam": {"id": 2, "name": "B"}, "matchday": "x"}
+        ]
+    })
+    service.sync_all("CL", full_refresh=True)
+    assert db.fetchall("SELECT id FROM matches") == [(1,)]
+    assert db.fetchone(
+        "SELECT COUNT(*) FROM duckdb_indexes() WHERE table_name = 'matches'"
+    )[0] == 3
+    db.close()
+
+
+def test_sync_all_reuses_matches_for_knockout(data_service, mock_db, mock_api_client):
+    """Test knockout matches are taken from the already fetched payload."""
+    mock_api_client.get_standings_and_matches.return_value = ({"standings": []}, {
+        "matches": [{
+            "id": 1,
+            "homeTeam": {"id": 1},
+            "awayTeam": {"id": 2},
+            "score": {"fullTime": {"home": None, "away": None}},
+            "utcDate": "2025-02-11T20:00:00Z",
+            "status": "SCHEDULED",
+            "stage": "PLAYOFFS"
+        }]
+    })
+
     data_service.sync_all("CL")
-    
-    # Should call all sync methods
-    assert mock_api_client.get_competition_standings.call_count >= 2
-    assert mock_api_client.get_competition_matches.call_count >= 1
-    assert mock_db.commit.call_count >= 3
 
+    mock_api_client.get_competition_matches.assert_not_called()
+    mock_api_client.get_competition_matches_by_stage.assert_not_called()
+    # The knockout match was stored by sync_matches and is not written again
+    assert len(_inserts(mock_db, "matches")) == 1
+
+
+def test_sync_knockout_matches_single_request(data_service, mock_api_client):
+    """Test standalone knockout sync issues one stage-filtered request."""
+    mock_api_client.get_competition_matches_by_stage.return_value = {"matches": []}
+
+    data_service.sync_knockout_matches("CL")
+
+    mock_api_client.get_competition_matches_by_stage.assert_called_once_with("CL", "KNOCKOUT_ROUND")
+    mock_api_client.get_competition_matches.assert_not_called()
+
+
+def test_bulk_upsert_falls_back_to_single_rows(tmp_path, mock_api_client):
+    """Test a rejected batch is retried row by row, skipping only bad rows."""
+    db = Database(db_path=str(tmp_path / "fallback.db"))
+    db.execute("INSERT INTO teams (id, name) VALUES (1, 'A'), (2, 'B')")
+    service = DataService(db, mock_api_client)
+    row = lambda match_id, away_team_id=2: (
+        match_id, 1, away_team_id, 0, 0, 1, "2024-10-01", "FINISHED", "LEAGUE_STAGE", None, None, "CL"
+    )
+
+    # Match 2 references an unknown team
+    assert service._bulk_upsert_matches([row(1), row(2, away_team_id=99), row(3)]) == 2
+    assert db.fetchall("SELECT id FROM matches ORDER BY id") == [(1,), (3,)]
+    db.close()
+
+
+def test_staged_match_writes(tmp_path, mock_api_client):
+    """Test staged upserts merge into matches and skip rows with unknown teams."""
+    db = Database(db_path=str(tmp_path / "staged.db"))
+    db.execute("INSERT INTO teams (id, name) VALUES (1, 'A'), (2, 'B')")
+    service = DataService(db, mock_api_client)
+    row = lambda match_id, home_score, away_team_id=2: (
+        match_id, 1, away_team_id, home_score, 0, 1, "2024-10-01", "FINISHED", "LEAGUE_STAGE", None, None, "CL"
+    )
+
+    with service._staged_match_writes():
+        assert service._bulk_upsert_matches([row(1, 0), row(2, 0)]) == 2
+        assert service._bulk_upsert_matches([row(1, 3), row(3, 0, away_team_id=99)]) == 1
+
+    assert db.fetchall("SELECT id, home_score FROM matches ORDER BY id") == [(1, 3), (2, 0)]
+    db.close()
+
+
+def test_staged_match_writes_are_per_thread(tmp_path, mock_api_client):
+    """Test another thread's match writes bypass this thread's staging table."""
+    db = Database(db_path=str(tmp_path / "staged_threads.db"))
+    db.execute("INSERT INTO teams (id, name) VALUES (1, 'A'), (2, 'B')")
+    service = DataService(db, mock_api_client)
+    row = (1, 1, 2, 0, 0, 1, "2024-10-01", "FINISHED", "LEAGUE_STAGE", None, None, "CL")
+
+    with service._staged_match_writes():
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            assert pool.submit(service._bulk_upsert_matches, [row]).result() == 1
+
+    assert db.fetchall("SELECT id FROM matches") == [(1,)]
+    db.close()
+
+
+def test_changed_match_rows_skips_stored_rows(tmp_path, mock_api_client):
+    """Test only new or modified match rows are kept for writing."""
+    db = Database(db_path=str(tmp_path / "changed.db"))
+    db.execute("INSERT INTO teams (id, name) VALUES (1, 'A'), (2, 'B')")
+    service = DataService(db, mock_api_client)
+    row = lambda match_id, home_score: (
+        match_id, 1, 2, home_score, 0, 1, "2024-10-01", "FINISHED", "LEAGUE_STAGE", None, None, "CL"
+    )
+    service._bulk_upsert_matches([row(1, 0), row(2, 0)])
+
+    assert service._changed_match_rows([row(1, 0), row(2, 1), row(3, 0)]) == [row(2, 1), row(3, 0)]
+    assert service._changed_match_rows([]) == []
+    db.close()
+
+
+def test_team_to_row():
+    """Test team codes fall back from tla to shortName."""
+    assert _team_to_row({"id": 1, "name": "Team A", "tla": "TA", "shortName": "A", "crest": "a.png"}) == (
+        1, "Team A", "TA", "a.png"
+    )
+    assert _team_to_row({"id": 2, "name": "Team B", "shortName": "B"}) == (2, "Team B", "B", None)
+
+
+def test_match_to_row():
+    """Test API matches are normalized to insert rows, rejecting incomplete ones."""
+    match = {
+        "id": 7,
+        "homeTeam": {"id": 1},
+        "awayTeam": {"id": 2},
+        "score": {"fullTime": {"home": 3, "away": 1}},
+        "matchday": 2,
+        "utcDate": "2024-10-01T19:00:00Z",
+        "status": "FINISHED",
+        "stage": "LEAGUE_STAGE",
+        "round": {"name": "League phase"},
+        "group": "GROUP_A"
+    }
+
+    assert _match_to_row(match, "CL") == (
+        7, 1, 2, 3, 1, 2, "2024-10-01T19:00:00Z", "FINISHED", "LEAGUE_STAGE", "League phase", "GROUP_A", "CL"
+    )
+    assert _match_to_row({"id": 8, "homeTeam": {"id": 1}, "awayTeam": {}}, "CL") is None
+
+
+def test_standing_to_row():
+    """Test standings entries are normalized to rows, rejecting those without a team."""
+    entry = {"team": {"id": 5}, "position": 2, "playedGames": 4, "points": 9}
+
+    assert _standing_to_row(entry, "now") == (5, 2, 4, 0, 0, 0, 0, 0, 0, 9, "now")
+    assert _standing_to_row({"team": None, "position": 3}, "now") is None
+
+
+def test_synthetic_match_id_is_stable():
+    """Test GitHub match IDs are deterministic, negative and fit in INTEGER."""
+    match_id = _synthetic_match_id("CL", -1000, -2001, "2019-09-18")
+
+    # Fixed value: must not change between runs or releases
+    assert match_id == -329424115
+    assert match_id != _synthetic_match_id("CL", -2001, -1000, "2019-09-18")
+
+
+def test_parse_github_season_reads_file_lines(data_service):
+    """Test GitHub seasons are parsed from the open file and the file is closed."""
+    season_file = io.StringIO(
+        "= UEFA Champions League 2019/20\n"
+        "\n"
+        "Group A  | Paris Saint-Germain  Real Madrid  Club Brugge  Galatasaray\n"
+        "\n"
+        "[Wed Sep/18]\n"
+        "  Club Brugge           0-0  Galatasaray\n"
+        "  Paris Saint-Germain   3-0  Real Madrid\n"
+    )
+    data_service.github_fetcher = Mock()
+    data_service.github_fetcher.open_season_file.return_value = season_file
+
+    parsed = data_service._parse_github_season("CL", "Champions League", 2019)
+
+    data_service.github_fetcher.open_season_file.assert_called_once_with("2019-20", "CL")
+    assert season_file.closed
+    assert [m["home_team"] for m in parsed["matches"]] == ["Club Brugge", "Paris Saint-Germain"]
+    assert parsed["matches"][0]["date"] == "2019-09-18"
+    assert {"name": "Galatasaray"} in parsed["teams"]
@@ -3,7 +3,9 @@ import pytest
 import tempfile
 import os
 from pathlib import Path
-from backend.database import Database
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+from backend.database import Database, SCHEMA_VERSION
 
 
 @pytest.fixture
@@ -12,14 +14,14 @@ def temp_db():
     # Create a temporary file path
     fd, db_path = tempfile.mkstemp(suffix='.db')
     os.close(fd)
-    
+
     # Remove the file if it exists (DuckDB will create it)
     if os.path.exists(db_path):
         os.unlink(db_path)
-    
+
     db = Database(db_path=db_path)
     yield db
-    
+
     db.close()
     # Clean up database files
     if os.path.exists(db_path):
@@ -32,11 +34,11 @@ def test_database_initialization(temp_db):
     """Test database initialization creates tables."""
     # Check that tables exist
     tables = temp_db.fetchall("""
-        SELECT name FROM sqlite_master 
+        SELECT name FROM sqlite_master
         WHERE type='table' AND name IN ('teams', 'matches', 'standings', 'solkoff_coefficients')
     """)
     table_names = [row[0] for row in tables]
-    
+
     assert 'teams' in table_names
     assert 'matches' in table_names
     assert 'standings' in table_names
@@ -47,11 +49,11 @@ def test_teams_table_structure(temp_db):
     """Test teams table has correct structure."""
     # Insert a test team
     temp_db.execute("""
-        INSERT INTO teams (id, name, code) 
+        INSERT INTO teams (id, name, code)
         VALUES (1, 'Test Team', 'TT')
     """)
     temp_db.commit()
-    
+
     # Verify insertion
     result = temp_db.fetchone("SELECT name, code FROM teams WHERE id = 1")
     assert result[0] == 'Test Team'
@@ -63,14 +65,14 @@ def test_matches_table_structure(temp_db):
     # Insert test teams
     temp_db.execute("INSERT INTO teams (id, name) VALUES (1, 'Team A')")
     temp_db.execute("INSERT INTO teams (id, name) VALUES (2, 'Team B')")
-    
+
     # Insert a match
     temp_db.execute("""
         INSERT INTO matches (id, home_team_id, away_team_id, home_score, away_score, matchday)
         VALUES (1, 1, 2, 2, 1, 1)
     """)
     temp_db.commit()
-    
+
     # Verify insertion
     result = temp_db.fetchone("SELECT home_score, away_score FROM matches WHERE id = 1")
     assert result[0] == 2
@@ -81,15 +83,15 @@ def test_standings_table_structure(temp_db):
     """Test standings table has correct structure."""
     # Insert test team
     temp_db.execute("INSERT INTO teams (id, name) VALUES (1, 'Test Team')")
-    
+
     # Insert standings
     temp_db.execute("""
-        INSERT INTO standings (team_id, position, played, won, drawn, lost, 
+        INSERT INTO standings (team_id, position, played, won, drawn, lost,
                              goals_for, goals_against, goal_difference, points)
         VALUES (1, 1, 5, 3, 1, 1, 10, 5, 5, 10)
     """)
     temp_db.commit()
-    
+
     # Verify insertion
     result = temp_db.fetchone("SELECT points, goal_difference FROM standings WHERE team_id = 1")
     assert result[0] == 10
@@ -100,14 +102,14 @@ def test_solkoff_coefficients_table_structure(temp_db):
     """Test solkoff_coefficients table has correct structure."""
     # Insert test team
     temp_db.execute("INSERT INTO teams (id, name) VALUES (1, 'Test Team')")
-    
+
     # Insert Solkoff coefficient
     temp_db.execute("""
         INSERT INTO solkoff_coefficients (team_id, solkoff_value, calculated_at)
         VALUES (1, 25, '2024-01-01T00:00:00Z')
     """)
     temp_db.commit()
-    
+
     # Verify insertion
     result = temp_db.fetchone("SELECT solkoff_value FROM solkoff_coefficients WHERE team_id = 1")
     assert result[0] == 25
@@ -120,3 +122,128 @@ def test_context_manager(temp_db):
         result = db.fetchone("SELECT 1")
         assert result[0] == 1
 
+
+def test_bulk_load_restores_settings(temp_db):
+    """Test bulk_load() relaxes checkpointing only inside the block."""
+    setting = "SELECT current_setting('wal_autocheckpoint')"
+    default = temp_db.fetchone(setting)[0]
+
+    with temp_db.bulk_load():
+        assert temp_db.fetchone(setting)[0] != default
+        temp_db.execute("INSERT INTO teams (id, name) VALUES (1, 'Team A')")
+
+    assert temp_db.fetchone(setting)[0] == default
+    assert temp_db.fetchone("SELECT COUNT(*) FROM teams")[0] == 1
+
+
+def test_bulk_load_tolerates_concurrent_writers(temp_db):
+    """Test bulk_load() doesn't fail when its checkpoint is blocked by a writer."""
+    writer = temp_db.cursor()
+    writer.execute("BEGIN TRANSACTION")
+    writer.execute("INSERT INTO teams (id, name) VALUES (2, 'Team B')")
+
+    with temp_db.bulk_load():
+        temp_db.execute("INSERT INTO teams (id, name) VALUES (1, 'Team A')")
+
+    writer.execute("COMMIT")
+    writer.close()
+    assert temp_db.fetchone("SELECT COUNT(*) FROM teams")[0] == 2
+
+
+def test_without_indexes_recreates_them(temp_db):
+    """Test without_indexes() drops secondary indexes only inside the block."""
+    query = "SELECT index_name FROM duckdb_indexes() WHERE table_name = 'matches' ORDER BY index_name"
+    indexes = [("idx_matches_away_team",), ("idx_matches_competition_date",), ("idx_matches_home_team",)]
+    assert temp_db.fetchall(query) == indexes
+
+    with temp_db.without_indexes("matches"):
+        assert temp_db.fetchall(query) == []
+
+    assert temp_db.fetchall(query) == indexes
+
+
+def test_transaction_nests_into_outer_block(temp_db):
+    """Test a failing outer transaction also discards a nested block's writes."""
+    with temp_db.transaction():
+        temp_db.execute("INSERT INTO teams (id, name) VALUES (1, 'Team A')")
+
+    with pytest.raises(RuntimeError):
+        with temp_db.transaction():
+            with temp_db.transaction():
+                temp_db.execute("INSERT INTO teams (id, name) VALUES (2, 'Team B')")
+            raise RuntimeError("boom")
+
+    assert temp_db.fetchall("SELECT id FROM teams") == [(1,)]
+
+
+def test_migrations_run_once(tmp_path):
+    """Test an old database is migrated on open and later opens skip the checks."""
+    db_path = str(tmp_path / "old.db")
+    db = Database(db_path=db_path)
+    # Simulate a database from before schema versioning, missing a newer column
+    for index_name in ("idx_matches_competition_date", "idx_matches_home_team", "idx_matches_away_team"):
+        db.execute(f"DROP INDEX {index_name}")
+    db.execute("ALTER TABLE matches DROP COLUMN group_name")
+    db.execute("DROP TABLE schema_version")
+    db.close()
+
+    db = Database(db_path=db_path)
+    columns = {row[0] for row in db.fetchall("DESCRIBE matches")}
+    assert "group_name" in columns
+    assert db.fetchall("SELECT version FROM schema_version") == [(SCHEMA_VERSION,)]
+    db.close()
+
+    with patch.object(Database, "_migrate_matches_table") as migrate:
+        Database(db_path=db_path).close()
+    migrate.assert_not_called()
+
+
+def test_solkoff_values_migrated_to_real(tmp_path):
+    """Test an INTEGER solkoff_value column is converted in place, keeping its rows."""
+    db_path = str(tmp_path / "old.db")
+    db = Database(db_path=db_path)
+    db.execute("INSERT INTO teams (id, name) VALUES (1, 'A')")
+    db.execute("DROP TABLE solkoff_coefficients")
+    db.execute("""
+        CREATE TABLE solkoff_coefficients (
+            team_id INTEGER PRIMARY KEY,
+            solkoff_value INTEGER NOT NULL,
+            calculated_at TEXT NOT NULL,
+            FOREIGN KEY (team_id) REFERENCES teams(id)
+        )
+    """)
+    db.execute("INSERT INTO solkoff_coefficients VALUES (1, 7, 'now')")
+    db.execute("DELETE FROM schema_version")
+    db.close()
+
+    db = Database(db_path=db_path)
+    columns = {row[0]: row[1] for row in db.fetchall("DESCRIBE solkoff_coefficients")}
+    assert columns["solkoff_value"] == "FLOAT"
+    assert db.fetchall("SELECT * FROM solkoff_coefficients") == [(1, 7.0, "now")]
+    db.close()
+
+
+def test_transactions_are_per_thread(temp_db):
+    """Test another thread's writes don't join an open transaction."""
+    def write_in_thread():
+        assert not temp_db.in_transaction()
+        with temp_db.transaction():
+            temp_db.execute("INSERT INTO teams (id, name) VALUES (2, 'B')")
+
+    with pytest.raises(RuntimeError):
+        with temp_db.transaction():
+            temp_db.execute("INSERT INTO teams (id, name) VALUES (1, 'A')")
+            with ThreadPoolExecutor(max_workers=1) as pool:
+                pool.submit(write_in_thread).result()
+            raise RuntimeError("boom")
+
+    assert temp_db.fetchall("SELECT id FROM teams") == [(2,)]
+
+
+def test_thread_connections_close_with_their_thread(temp_db):
+    """Test connections opened for worker threads don't outlive the workers."""
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        list(pool.map(lambda _: temp_db.fetchone("SELECT 1"), range(4)))
+
+    assert temp_db._thread_conns
+    assert not any(finalizer.alive for finalizer in temp_db._thread_conns)
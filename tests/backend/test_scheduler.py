@@ -19,6 +19,7 @@ def scheduler(mock_db):
          patch('backend.scheduler.SolkoffCalculator'), \
          patch('backend.scheduler.EloCalculator'):
         sched = DataScheduler(mock_db, "CL")
+        sched.api_cache = Mock()
         sched.data_service = Mock()
         sched.calculator = Mock()
         sched.elo_calculator = Mock()